@@ -0,0 +1,332 @@
+# batch_render.py
+#
+# GUI を起動せずに、シリーズを W/L 適用済みの PNG/JPEG 画像とコンタクトシートに書き出す。
+# 読み込み (プリスキャン・デコード) と W/L 変換はビューワーと同じ dicom_read / dicom_render を使う。
+#
+#   python batch_render.py /data/CT --output out --window lung --window mediastinum --stride 5
+#   python batch_render.py --index --search CHEST --planes Axial,Coronal --sheets-only --output out
+
+import argparse
+import os
+import re
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+from PIL import Image, ImageDraw
+
+from dicom_read import read_series
+from dicom_read.read_series import SliceHeader
+from dicom_read.series_index import DEFAULT_INDEX_PATH, SeriesIndex
+from dicom_render.window_lut import WindowLevelRenderer
+
+PLANES = ("Axial", "Coronal", "Sagittal")
+IMAGE_FORMATS = {'png': 'PNG', 'jpeg': 'JPEG'}
+
+# 名前で指定できる W/L (WW, WL)。'auto' はビューワーの自動輝度調整と同じ 1〜99 パーセンタイル
+WINDOW_PRESETS = {
+    'lung': (1500.0, -600.0),
+    'mediastinum': (400.0, 40.0),
+    'abdomen': (350.0, 50.0),
+    'bone': (2000.0, 400.0),
+    'brain': (80.0, 40.0),
+}
+AUTO_WINDOW_PERCENTILES = (1.0, 99.0)
+
+# 同時に読み込むボリュームの合計サイズの上限 (ワーカーごとにボリュームを1つ持つ)
+DEFAULT_MEMORY_BUDGET_MB = 2048
+DEFAULT_THUMB_SIZE = 256
+DEFAULT_SHEET_COLUMNS = 6
+
+
+@dataclass
+class RenderTask:
+    """
+    ワーカープロセスに渡す1シリーズ分の書き出し内容 (ヘッダのみで、ピクセルは含まない)。
+    """
+    headers: List[SliceHeader]
+    output_dir: str
+    windows: List[Tuple[str, float | None, float | None]]  # (名前, WW, WL)。auto は WW/WL が None
+    planes: List[str]
+    stride: int = 1
+    image_format: str = 'png'
+    quality: int = 90
+    write_images: bool = True
+    contact_sheet: bool = False
+    thumb_size: int = DEFAULT_THUMB_SIZE
+    sheet_columns: int = DEFAULT_SHEET_COLUMNS
+
+
+@dataclass
+class RenderResult:
+    output_dir: str
+    images: int = 0
+    sheets: int = 0
+    seconds: float = 0.0
+    error: str = ''
+
+
+def parse_window(spec: str) -> Tuple[str, float | None, float | None]:
+    """
+    'lung' / 'auto' / 'NAME=WW,WL' / 'WW,WL' 形式の W/L 指定を (名前, WW, WL) にする。
+    """
+    if '=' not in spec and ',' not in spec:
+        name = spec.strip().lower()
+        if name == 'auto':
+            return 'auto', None, None
+        if name not in WINDOW_PRESETS:
+            raise argparse.ArgumentTypeError(
+                f"未対応の W/L 指定です: {spec} ({', '.join(['auto', *WINDOW_PRESETS])} または NAME=WW,WL)")
+        return (name, *WINDOW_PRESETS[name])
+
+    name, _, values = spec.rpartition('=')
+    try:
+        ww, wl = (float(v) for v in values.split(','))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"W/L は WW,WL の形式で指定してください: {spec}")
+    if ww <= 0:
+        raise argparse.ArgumentTypeError(f"WW は正の値を指定してください: {spec}")
+    return name or f"w{ww:g}_l{wl:g}", ww, wl
+
+
+def series_dir_name(headers: List[SliceHeader]) -> str:
+    """
+    出力先のディレクトリ名 (シリーズ番号_説明_UIDの末尾)。
+    """
+    h = headers[0]
+    number = f"{h.series_number:03d}" if h.series_number is not None else "000"
+    description = re.sub(r'[^0-9A-Za-z_-]+', '_', h.series_description).strip('_')
+    uid_tail = h.series_uid.rsplit('.', 1)[-1] if h.series_uid else 'nouid'
+    return "_".join(p for p in (number, description, uid_tail) if p)
+
+
+def estimate_volume_bytes(headers: List[SliceHeader], planes: List[str], stride: int) -> int:
+    """
+    render_series が確保するボリュームの大きさ。Axial だけの場合は間引いたスライス分。
+    """
+    n = len(headers)
+    if set(planes) == {"Axial"}:
+        n = len(range(0, n, stride))
+    h = headers[0]
+    return n * h.rows * h.cols * read_series.pixel_dtype(h).itemsize
+
+
+def _plane_indices(volume: read_series.SeriesVolume, plane: str, stride: int,
+                   axial_subsampled: bool) -> Iterator[Tuple[int, int]]:
+    # (ボリューム内の位置, ファイル名に使う元のスライス番号)
+    z, y, x = volume.shape
+    if plane == "Axial":
+        step = 1 if axial_subsampled else stride
+        for i in range(0, z, step):
+            yield i, i * stride if axial_subsampled else i
+    else:
+        for i in range(0, y if plane == "Coronal" else x, stride):
+            yield i, i
+
+
+def _contact_sheet(thumbs: List[Tuple[int, Image.Image]], columns: int, thumb_size: int) -> Image.Image:
+    rows = (len(thumbs) + columns - 1) // columns
+    sheet = Image.new('L', (columns * thumb_size, rows * thumb_size), 0)
+    draw = ImageDraw.Draw(sheet)
+    for i, (number, thumb) in enumerate(thumbs):
+        left = (i % columns) * thumb_size + (thumb_size - thumb.width) // 2
+        top = (i // columns) * thumb_size + (thumb_size - thumb.height) // 2
+        sheet.paste(thumb, (left, top))
+        draw.text(((i % columns) * thumb_size + 4, (i // columns) * thumb_size + 2), str(number + 1), fill=255)
+    return sheet
+
+
+def render_series(task: RenderTask) -> RenderResult:
+    """
+    1シリーズを読み込み、W/L・断面ごとに画像 (とコンタクトシート) を書き出す。
+    ワーカープロセスで実行する。デコードはこのプロセス内で逐次行う (並列化はシリーズ単位)。
+    """
+    start = time.perf_counter()
+    result = RenderResult(task.output_dir)
+    try:
+        headers = read_series.sort_slices(task.headers)
+        # Axial だけを書き出す場合は、間引いた後のスライスだけをデコードする
+        axial_subsampled = set(task.planes) == {"Axial"} and task.stride > 1
+        if axial_subsampled:
+            headers = headers[::task.stride]
+        volume = read_series.load_series_volume(headers, workers=1)
+
+        first = headers[0]
+        sp_y, sp_x = (first.pixel_spacing + [1.0, 1.0])[:2]
+        st = first.slice_thickness * (task.stride if axial_subsampled else 1)
+        # 画面表示と同じく、Coronal/Sagittal は縦 (Z) をスライス厚に合わせて伸縮する
+        aspect = {"Axial": 1.0, "Coronal": st / sp_x if sp_x > 0 else 1.0,
+                  "Sagittal": st / sp_y if sp_y > 0 else 1.0}
+
+        os.makedirs(task.output_dir, exist_ok=True)
+        renderer = WindowLevelRenderer()
+        extension = 'jpg' if task.image_format == 'jpeg' else task.image_format
+        save_kwargs = {'quality': task.quality} if task.image_format == 'jpeg' else {}
+
+        for name, ww, wl in task.windows:
+            if ww is None:
+                p1, p99 = volume.hu_percentile(AUTO_WINDOW_PERCENTILES)
+                ww, wl = max(1.0, float(p99 - p1)), float(p99 + p1) / 2
+            for plane in task.planes:
+                thumbs = []
+                for index, number in _plane_indices(volume, plane, task.stride, axial_subsampled):
+                    raw = volume.plane_raw(plane, index)
+                    slope, intercept = volume.uniform_rescale or volume.plane_rescale(plane, index)
+                    image = Image.fromarray(renderer.render(raw, ww, wl, slope, intercept))
+                    if aspect[plane] != 1.0:
+                        image = image.resize((image.width, max(1, round(image.height * aspect[plane]))),
+                                             Image.BILINEAR)
+                    if task.write_images:
+                        path = os.path.join(task.output_dir, f"{name}_{plane.lower()}_{number + 1:04d}.{extension}")
+                        image.save(path, IMAGE_FORMATS[task.image_format], **save_kwargs)
+                    if task.contact_sheet:
+                        # fromarray の画像は renderer の出力バッファを共有するため、縮小前にコピーする
+                        thumb = image.copy()
+                        thumb.thumbnail((task.thumb_size, task.thumb_size), Image.BILINEAR)
+                        thumbs.append((number, thumb))
+                    result.images += 1
+
+                if task.contact_sheet and thumbs:
+                    path = os.path.join(task.output_dir, f"{name}_{plane.lower()}_sheet.{extension}")
+                    _contact_sheet(thumbs, task.sheet_columns, task.thumb_size).save(
+                        path, IMAGE_FORMATS[task.image_format], **save_kwargs)
+                    result.sheets += 1
+    except Exception as e:
+        result.error = str(e)
+    result.seconds = time.perf_counter() - start
+    return result
+
+
+def collect_series_from_folders(folders: List[str], workers: int | None = None) -> Iterator[List[SliceHeader]]:
+    """
+    フォルダごとにプリスキャンし、ボリュームとして積み重ねられるグループを返す。
+    """
+    for folder in folders:
+        files = read_series.list_dicom_files(folder)
+        if not files:
+            print(f"DICOMファイルがありません: {folder}")
+            continue
+        yield from read_series.group_series(read_series.prescan_headers(files, workers))
+
+
+def collect_series_from_index(db_path: str, search: str) -> Iterator[List[SliceHeader]]:
+    """
+    索引 (SeriesIndex) から検索したシリーズを返す (ファイルのヘッダは読み直さない)。
+    """
+    index = SeriesIndex(db_path)
+    seen = set()
+    for series in index.search(search, limit=1_000_000):
+        # search はグループごとに返すため、同じシリーズのヘッダは1度だけ読んで分ける
+        if series['series_uid'] in seen:
+            continue
+        seen.add(series['series_uid'])
+        yield from read_series.group_series(index.series_headers(series['series_uid']))
+
+
+def run_tasks(tasks: Iterator[RenderTask], workers: int, memory_budget: int) -> Iterator[RenderResult]:
+    """
+    タスクをプロセスプールで実行し、終わった順に結果を返す。
+
+    実行中のタスクのボリュームの合計 (推定) が memory_budget を超えないよう投入を待つ。
+    1つで上限を超えるシリーズも、他に実行中のタスクが無ければ単独で実行する。
+    """
+    if workers == 1:
+        for task in tasks:
+            yield render_series(task)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        running = {}  # Future -> 推定バイト数
+        for task in tasks:
+            size = estimate_volume_bytes(task.headers, task.planes, task.stride)
+            while running and (len(running) >= workers or sum(running.values()) + size > memory_budget):
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    del running[future]
+                    yield future.result()
+            running[pool.submit(render_series, task)] = size
+        for future in list(running):
+            yield future.result()
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="DICOM シリーズを W/L 適用済みの画像・コンタクトシートに書き出す")
+    parser.add_argument('folders', nargs='*', help="DICOM ファイルのあるフォルダ (フォルダ内の全シリーズを書き出す)")
+    parser.add_argument('--index', nargs='?', const=DEFAULT_INDEX_PATH, help="フォルダの代わりに使う索引 (SQLite)")
+    parser.add_argument('--search', default='', help="索引から書き出すシリーズの検索文字列 (患者名・ID・説明・モダリティ)")
+    parser.add_argument('--output', required=True, help="出力先ディレクトリ (シリーズごとにサブディレクトリを作る)")
+    parser.add_argument('--window', dest='windows', action='append', type=parse_window,
+                        help=f"W/L ({', '.join(['auto', *WINDOW_PRESETS])} または NAME=WW,WL)。複数指定可。既定は auto")
+    parser.add_argument('--planes', default='Axial', help="書き出す断面 (Axial,Coronal,Sagittal のカンマ区切り)")
+    parser.add_argument('--stride', type=int, default=1, help="書き出すスライスの間隔")
+    parser.add_argument('--format', dest='image_format', choices=sorted(IMAGE_FORMATS), default='png')
+    parser.add_argument('--quality', type=int, default=90, help="JPEG の品質")
+    parser.add_argument('--contact-sheet', action='store_true', help="断面ごとにコンタクトシートを書き出す")
+    parser.add_argument('--sheets-only', action='store_true', help="コンタクトシートだけを書き出す")
+    parser.add_argument('--thumb-size', type=int, default=DEFAULT_THUMB_SIZE, help="コンタクトシートの1コマの大きさ (px)")
+    parser.add_argument('--sheet-columns', type=int, default=DEFAULT_SHEET_COLUMNS, help="コンタクトシートの列数")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="ワーカープロセス数")
+    parser.add_argument('--memory-budget', type=int, default=DEFAULT_MEMORY_BUDGET_MB,
+                        help="同時に読み込むボリュームの合計の上限 (MB)")
+    args = parser.parse_args(argv)
+
+    planes = [p.strip().capitalize() for p in args.planes.split(',') if p.strip()]
+    unknown = [p for p in planes if p not in PLANES]
+    if unknown or not planes:
+        parser.error(f"未対応の断面です: {', '.join(unknown)} ({'/'.join(PLANES)} のいずれか)")
+    if args.stride < 1:
+        parser.error("--stride は 1 以上を指定してください")
+    if not args.folders and args.index is None:
+        parser.error("フォルダまたは --index を指定してください")
+
+    if args.index is not None:
+        series = collect_series_from_index(args.index, args.search)
+    else:
+        series = collect_series_from_folders(args.folders)
+
+    used_names = set()
+
+    def tasks() -> Iterator[RenderTask]:
+        for headers in series:
+            name = series_dir_name(headers)
+            while name in used_names:
+                name += "_"
+            used_names.add(name)
+            yield RenderTask(
+                headers=headers,
+                output_dir=os.path.join(args.output, name),
+                windows=args.windows or [parse_window('auto')],
+                planes=planes,
+                stride=args.stride,
+                image_format=args.image_format,
+                quality=args.quality,
+                write_images=not args.sheets_only,
+                contact_sheet=args.contact_sheet or args.sheets_only,
+                thumb_size=args.thumb_size,
+                sheet_columns=args.sheet_columns,
+            )
+
+    start = time.perf_counter()
+    n_series, n_images, n_errors = 0, 0, 0
+    for result in run_tasks(tasks(), max(1, args.workers), args.memory_budget * 1024 ** 2):
+        n_series += 1
+        if result.error:
+            n_errors += 1
+            print(f"書き出しエラー ({result.output_dir}): {result.error}")
+            continue
+        n_images += result.images
+        rate = result.images / result.seconds if result.seconds > 0 else 0.0
+        print(f"{result.output_dir}: {result.images} 枚, シート {result.sheets} 枚 "
+              f"({result.seconds:.2f} s, {rate:.1f} 枚/s)")
+
+    elapsed = time.perf_counter() - start
+    throughput = n_images / elapsed if elapsed > 0 else 0.0
+    print(f"\n{n_series} シリーズ, {n_images} 枚を {elapsed:.2f} s で書き出しました ({throughput:.1f} 枚/s)"
+          + (f", エラー {n_errors} 件" if n_errors else ""))
+    return 1 if n_errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
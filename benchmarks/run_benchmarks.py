@@ -0,0 +1,247 @@
+# benchmarks/run_benchmarks.py
+#
+# 合成シリーズで読み込み・自動W/L・断面描画・MPR・ウィジェット描画の時間を計り、JSON に保存する。
+#
+#   python -m benchmarks.run_benchmarks --slices 200 --size 512 --output results.json
+#   python -m benchmarks.run_benchmarks --compare baseline.json --output results.json
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+# Qt はディスプレイの無い環境でも動くよう offscreen で起動する
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+import numpy as np
+import pydicom
+import PySide6
+from PySide6.QtWidgets import QApplication
+
+import viewer_release
+from benchmarks.synthetic_series import TRANSFER_SYNTAXES, write_synthetic_series
+from dicom_read import volume_cache
+
+RESULT_VERSION = 1
+REGRESSION_THRESHOLD = 1.10  # 比較時に、この倍率より遅くなった項目を回帰として表示する
+
+
+def summarize(times: List[float]) -> Dict[str, float]:
+    """
+    計測時間 (秒) の一覧を ms 単位の統計にまとめる。
+    """
+    ms = np.asarray(times) * 1000
+    return {
+        'median_ms': float(np.median(ms)),
+        'p95_ms': float(np.percentile(ms, 95)),
+        'min_ms': float(ms.min()),
+        'max_ms': float(ms.max()),
+        'n': len(times),
+    }
+
+
+def time_calls(fn: Callable[[int], None], repeat: int) -> List[float]:
+    times = []
+    for i in range(repeat):
+        start = time.perf_counter()
+        fn(i)
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def process_events_until(app: QApplication, done: Callable[[], bool], timeout: float = 60.0) -> None:
+    deadline = time.perf_counter() + timeout
+    while not done():
+        if time.perf_counter() > deadline:
+            raise TimeoutError("ベンチマークの待機がタイムアウトしました。")
+        app.processEvents()
+
+
+def create_viewer(app: QApplication, work_dir: str, cache_dir: str | None = None) -> viewer_release.PyQtDicomViewer:
+    # 索引も作業ディレクトリに置き、利用者の ~/.ctmr_viewer_cache には触れない
+    viewer = viewer_release.PyQtDicomViewer(index_path=os.path.join(work_dir, 'index.sqlite3'))
+    viewer.volume_cache = volume_cache.VolumeCache(cache_dir) if cache_dir else None
+    viewer.resize(1200, 800)
+    viewer.show()
+    app.processEvents()
+    return viewer
+
+
+def bench_load(app: QApplication, folder: str, repeat: int, work_dir: str) -> Dict[str, Dict]:
+    results = {}
+
+    # 同期読み込み (プリスキャン + 並列デコード)
+    viewer = create_viewer(app, work_dir)
+    viewer.streaming_load = False
+    results['load_sync'] = summarize(time_calls(lambda _: viewer.load_dicom_folder(folder), repeat))
+
+    # 段階的読み込み: 最初の画像までの時間と全体の時間
+    viewer.streaming_load = True
+    ttfi, total = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        viewer.load_dicom_folder(folder)
+        process_events_until(app, lambda: viewer.volume is not None and viewer.volume.is_complete
+                             and not viewer._load_thread.isRunning())
+        total.append(time.perf_counter() - start)
+        ttfi.append(viewer._first_image_time - viewer._load_start_time)
+    results['load_streaming_first_image'] = summarize(ttfi)
+    results['load_streaming_total'] = summarize(total)
+    viewer.close()
+
+    # ディスクキャッシュ (メモリマップ) からの読み込み
+    viewer = create_viewer(app, work_dir, cache_dir=os.path.join(work_dir, 'volume_cache'))
+    viewer.streaming_load = False
+    viewer.load_dicom_folder(folder)  # キャッシュを作る
+    results['load_cached'] = summarize(time_calls(lambda _: viewer.load_dicom_folder(folder), repeat))
+    viewer.close()
+    return results
+
+
+def bench_viewer(app: QApplication, folder: str, repeat: int, work_dir: str) -> Dict[str, Dict]:
+    results = {}
+    viewer = create_viewer(app, work_dir)
+    viewer.streaming_load = False
+    viewer.load_dicom_folder(folder)
+    shape = viewer.volume.shape
+
+    for target in ("ボリューム全体", "表示中の画像"):
+        viewer.auto_wwl_target_selector.setCurrentText(target)
+        key = 'auto_wwl_volume' if target == "ボリューム全体" else 'auto_wwl_visible'
+        results[key] = summarize(time_calls(lambda _: viewer.auto_adjust_wwl(), repeat))
+
+    # 単断面: スライス移動 (load_image) と W/L 変更のみ (update_image)
+    sizes = {"Axial": shape[0], "Coronal": shape[1], "Sagittal": shape[2]}
+    for plane, n in sizes.items():
+        viewer.plane_selector.setCurrentText(plane)
+
+        def step(i, n=n):
+            viewer.index = (i * 7) % n
+            viewer.load_image()
+        results[f'slice_{plane.lower()}'] = summarize(time_calls(step, repeat))
+
+        def window(i):
+            viewer.ww = 300.0 + (i % 50)
+            viewer.update_image()
+        results[f'render_{plane.lower()}'] = summarize(time_calls(window, repeat))
+
+    # ウィジェットの描画: 拡大縮小済み画像を作り直す場合とキャッシュを使う場合
+    viewer.plane_selector.setCurrentText("Axial")
+    widget = viewer.image_widget
+
+    def paint_uncached(_):
+        widget.invalidate_pixmap_cache()
+        widget.repaint()
+    results['paint_uncached'] = summarize(time_calls(paint_uncached, repeat))
+    results['paint_cached'] = summarize(time_calls(lambda _: widget.repaint(), repeat))
+
+    # MPR: 1断面だけ動かす場合と W/L で3断面を描き直す場合 (ワーカーの結果が届くまで)
+    viewer.switch_view_mode(1)
+    mpr = viewer.mpr_view_widget
+
+    def mpr_update(change):
+        def run(i):
+            change(i)
+            before = sum(mpr.render_counts.values())
+            mpr._flush_updates()
+            expected = before + len(mpr.last_flush_renders)
+            process_events_until(app, lambda: sum(mpr.render_counts.values()) >= expected)
+        return run
+
+    def move_x(i):
+        mpr.current_indices = [mpr.current_indices[0], mpr.current_indices[1], (i * 7) % shape[2]]
+
+    def change_window(i):
+        viewer.ww = 300.0 + (i % 50)
+
+    results['mpr_move_sagittal'] = summarize(time_calls(mpr_update(move_x), repeat))
+    results['mpr_window_all'] = summarize(time_calls(mpr_update(change_window), repeat))
+    results['mpr_paint'] = summarize(time_calls(lambda _: mpr.repaint(), repeat))
+    viewer.close()
+    return results
+
+
+def environment_info() -> Dict[str, str]:
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                  cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        revision = ''
+    return {
+        'revision': revision,
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pydicom': pydicom.__version__,
+        'pyside6': PySide6.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+    }
+
+
+def compare_results(current: Dict, baseline: Dict) -> None:
+    print(f"\n{'項目':32s} {'基準 (ms)':>10s} {'今回 (ms)':>10s} {'比':>7s}")
+    for name, entry in current['results'].items():
+        base = baseline.get('results', {}).get(name)
+        if base is None:
+            continue
+        ratio = entry['median_ms'] / base['median_ms'] if base['median_ms'] > 0 else float('nan')
+        mark = "  <-- 回帰" if ratio > REGRESSION_THRESHOLD else ""
+        print(f"{name:32s} {base['median_ms']:10.2f} {entry['median_ms']:10.2f} {ratio:7.2f}{mark}")
+
+
+def main(argv: List[str] | None = None) -> Dict:
+    parser = argparse.ArgumentParser(description="合成シリーズで DICOM ビューワーの性能を計測する")
+    parser.add_argument('--slices', type=int, default=100, help="スライス数")
+    parser.add_argument('--size', type=int, default=512, help="画像サイズ (Rows = Columns)")
+    parser.add_argument('--modality', choices=['CT', 'MR'], default='CT')
+    parser.add_argument('--transfer-syntax', choices=sorted(TRANSFER_SYNTAXES), default='explicit')
+    parser.add_argument('--repeat', type=int, default=20, help="各項目の計測回数 (読み込みは 1/5)")
+    parser.add_argument('--folder', help="合成シリーズの代わりに使う DICOM フォルダ")
+    parser.add_argument('--output', help="結果を保存する JSON ファイル")
+    parser.add_argument('--compare', help="比較する過去の結果 (JSON)")
+    args = parser.parse_args(argv)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    with tempfile.TemporaryDirectory(prefix='dicom_bench_') as work_dir:
+        folder = args.folder
+        if folder is None:
+            folder = os.path.join(work_dir, 'series')
+            start = time.perf_counter()
+            write_synthetic_series(folder, args.slices, args.size, args.size, args.modality, args.transfer_syntax)
+            print(f"合成シリーズを作成しました ({time.perf_counter() - start:.1f} s)")
+
+        results = {}
+        results.update(bench_load(app, folder, max(1, args.repeat // 5), work_dir))
+        results.update(bench_viewer(app, folder, args.repeat, work_dir))
+
+    report = {
+        'version': RESULT_VERSION,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment_info(),
+        'params': {
+            'slices': args.slices, 'size': args.size, 'modality': args.modality,
+            'transfer_syntax': args.transfer_syntax, 'repeat': args.repeat, 'folder': args.folder,
+        },
+        'results': results,
+    }
+
+    print(f"\n{'項目':32s} {'中央値 (ms)':>12s} {'p95 (ms)':>10s}")
+    for name, entry in results.items():
+        print(f"{name:32s} {entry['median_ms']:12.2f} {entry['p95_ms']:10.2f}")
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            compare_results(report, json.load(f))
+    return report
+
+
+if __name__ == '__main__':
+    main()
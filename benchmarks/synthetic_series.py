@@ -0,0 +1,131 @@
+# benchmarks/synthetic_series.py
+
+import os
+from typing import List
+
+import numpy as np
+from pydicom.dataset import Dataset, FileMetaDataset
+from pydicom.uid import (
+    generate_uid, CTImageStorage, MRImageStorage,
+    ImplicitVRLittleEndian, ExplicitVRLittleEndian, ExplicitVRBigEndian, RLELossless,
+)
+
+# 指定できる転送構文
+TRANSFER_SYNTAXES = {
+    'implicit': ImplicitVRLittleEndian,
+    'explicit': ExplicitVRLittleEndian,
+    'big': ExplicitVRBigEndian,
+    'rle': RLELossless,
+}
+
+# モダリティごとの SOP Class・格納形式・Rescale値
+_MODALITIES = {
+    'CT': {'sop_class': CTImageStorage, 'signed': True, 'slope': 1.0, 'intercept': -1024.0},
+    'MR': {'sop_class': MRImageStorage, 'signed': False, 'slope': 1.0, 'intercept': 0.0},
+}
+
+
+def phantom_slice(rows: int, cols: int, z: float, modality: str = 'CT',
+                  rng: np.random.Generator | None = None) -> np.ndarray:
+    """
+    楕円形の体幹と骨・臓器に相当する領域をもつ合成画像 (格納値) を作る。
+    z (0-1) によって楕円の大きさが変わるため、Coronal/Sagittal でも形が見える。
+    """
+    rng = rng or np.random.default_rng(0)
+    y, x = np.mgrid[-1:1:rows * 1j, -1:1:cols * 1j]
+    scale = 0.75 + 0.2 * np.sin(np.pi * z)
+    body = (x / (0.9 * scale)) ** 2 + (y / (0.7 * scale)) ** 2 <= 1
+    organ = ((x - 0.3) / 0.25) ** 2 + (y / 0.3) ** 2 <= 1
+    bone = (x / 0.12) ** 2 + ((y + 0.45 * scale) / 0.1) ** 2 <= 1
+
+    if modality == 'CT':
+        # 空気 -1000, 軟部 40, 臓器 60, 骨 800 (HU) に Intercept -1024 を足した格納値
+        hu = np.full((rows, cols), -1000.0)
+        hu[body] = 40
+        hu[body & organ] = 60
+        hu[body & bone] = 800
+        hu += rng.normal(0, 10, (rows, cols))
+        return np.clip(hu + 1024, 0, 4095).astype(np.int16)
+
+    signal = np.zeros((rows, cols))
+    signal[body] = 400
+    signal[body & organ] = 700
+    signal[body & bone] = 150
+    signal += np.abs(rng.normal(0, 15, (rows, cols)))
+    return np.clip(signal, 0, 4095).astype(np.uint16)
+
+
+def write_synthetic_series(folder: str, n_slices: int = 100, rows: int = 512, cols: int = 512,
+                           modality: str = 'CT', transfer_syntax: str = 'explicit',
+                           slice_thickness: float = 1.0, seed: int = 0) -> List[str]:
+    """
+    合成の CT/MR シリーズを DICOM ファイルとして書き出す。
+
+    ファイル名の順序とスライス位置の順序は一致させない (読み込み側の並び替えを通すため)。
+
+    Args:
+        folder (str): 出力先フォルダ (無い場合は作る)。
+        n_slices (int): スライス数。
+        rows (int), cols (int): 画像サイズ。
+        modality (str): 'CT' (int16, Intercept -1024) または 'MR' (uint16)。
+        transfer_syntax (str): TRANSFER_SYNTAXES のキー ('big' は Big Endian、'rle' は圧縮)。
+        slice_thickness (float): スライス間隔 (mm)。
+        seed (int): 乱数のシード。
+
+    Returns:
+        List[str]: 書き出したファイルのパス一覧 (スライス位置順)。
+    """
+    params = _MODALITIES[modality]
+    syntax = TRANSFER_SYNTAXES[transfer_syntax]
+    rng = np.random.default_rng(seed)
+    os.makedirs(folder, exist_ok=True)
+
+    study_uid, series_uid = generate_uid(), generate_uid()
+    order = rng.permutation(n_slices)
+    filepaths = []
+    for k in range(n_slices):
+        file_meta = FileMetaDataset()
+        file_meta.MediaStorageSOPClassUID = params['sop_class']
+        file_meta.MediaStorageSOPInstanceUID = generate_uid()
+        file_meta.TransferSyntaxUID = ExplicitVRLittleEndian if syntax == RLELossless else syntax
+
+        ds = Dataset()
+        ds.file_meta = file_meta
+        ds.SOPClassUID = params['sop_class']
+        ds.SOPInstanceUID = file_meta.MediaStorageSOPInstanceUID
+        ds.PatientName = "Synthetic^Phantom"
+        ds.PatientID = "SYNTH0001"
+        ds.StudyDate = "20260101"
+        ds.Modality = modality
+        ds.StudyInstanceUID = study_uid
+        ds.SeriesInstanceUID = series_uid
+        ds.SeriesNumber = 1
+        ds.SeriesDescription = f"Synthetic {modality} {transfer_syntax}"
+        ds.InstanceNumber = k + 1
+        ds.ImagePositionPatient = [0.0, 0.0, k * slice_thickness]
+        ds.ImageOrientationPatient = [1, 0, 0, 0, 1, 0]
+        ds.SliceLocation = k * slice_thickness
+        ds.SliceThickness = slice_thickness
+        ds.PixelSpacing = [0.7, 0.7]
+        ds.Rows, ds.Columns = rows, cols
+        ds.SamplesPerPixel = 1
+        ds.PhotometricInterpretation = "MONOCHROME2"
+        ds.BitsAllocated, ds.BitsStored, ds.HighBit = 16, 16, 15
+        ds.PixelRepresentation = 1 if params['signed'] else 0
+        ds.RescaleSlope = params['slope']
+        ds.RescaleIntercept = params['intercept']
+        ds.WindowCenter, ds.WindowWidth = (40, 400) if modality == 'CT' else (400, 800)
+
+        pixels = phantom_slice(rows, cols, k / max(1, n_slices - 1), modality, rng)
+        if syntax == RLELossless:
+            ds.PixelData = pixels.tobytes()
+            ds.compress(RLELossless, pixels)
+        elif syntax == ExplicitVRBigEndian:
+            ds.PixelData = pixels.astype(pixels.dtype.newbyteorder('>')).tobytes()
+        else:
+            ds.PixelData = pixels.tobytes()
+
+        filepath = os.path.join(folder, f"IM{order[k]:05d}.dcm")
+        ds.save_as(filepath, enforce_file_format=True)
+        filepaths.append(filepath)
+    return filepaths
@@ -0,0 +1,113 @@
+# dicom_perf/hud.py
+
+import time
+from collections import deque
+from typing import Dict, Hashable, List
+
+import numpy as np
+
+DEFAULT_WINDOW = 120   # 統計に使う直近のサンプル数
+FPS_WINDOW = 1.0       # FPS を数える直近の秒数
+
+# 入力から表示までの遅延を測る操作の種類と、HUD での表示名
+INPUT_KINDS = {
+    'wwl': "W/L",
+    'slice': "スライス",
+}
+
+
+def _percentiles(samples) -> str:
+    if not samples:
+        return "-"
+    p50, p95 = np.percentile(np.fromiter(samples, dtype=np.float64), (50, 95))
+    return f"{p50:.1f}/{p95:.1f}"
+
+
+class PerfStats:
+    """
+    画面上の性能表示 (HUD) 用に、描画・ペイント時間、入力から表示までの遅延、
+    キャッシュのヒット率を直近 window 件だけ保持する。
+
+    入力の遅延は、mark_input からその後に新しい画像が初めてペイントされるまでの時間。
+    ドラッグなどで描画前に同じ種類の入力が続いた場合は、最初の入力から測る
+    (まとめて間引かれた入力を含めた、操作者から見た遅れ)。
+    値は GUI スレッドから記録する。record_render だけはワーカースレッドから呼んでよい。
+    """
+
+    def __init__(self, window: int = DEFAULT_WINDOW):
+        self.render_ms = deque(maxlen=window)
+        self.paint_ms = deque(maxlen=window)
+        self.latency_ms = {kind: deque(maxlen=window) for kind in INPUT_KINDS}
+        self._frame_times: Dict[Hashable, deque] = {}
+        self._pending_inputs: Dict[str, float] = {}
+        self._cache: Dict[str, List[int]] = {}  # 名前 -> [ヒット, ミス]
+
+    def mark_input(self, kind: str) -> None:
+        self._pending_inputs.setdefault(kind, time.perf_counter())
+
+    def record_render(self, seconds: float) -> None:
+        # deque.append はスレッドセーフ
+        self.render_ms.append(seconds * 1000)
+
+    def record_paint(self, view: Hashable, start: float, end: float, new_image: bool) -> None:
+        """
+        ビューのペイント1回分を記録する。new_image が True (新しい画像を初めて描いた) の場合、
+        待っている入力の遅延を確定する。
+        """
+        self.paint_ms.append((end - start) * 1000)
+        frame_times = self._frame_times.get(view)
+        if frame_times is None:
+            frame_times = self._frame_times[view] = deque(maxlen=DEFAULT_WINDOW)
+        frame_times.append(end)
+
+        if new_image and self._pending_inputs:
+            for kind, input_time in self._pending_inputs.items():
+                self.latency_ms[kind].append((end - input_time) * 1000)
+            self._pending_inputs.clear()
+
+    def record_cache(self, name: str, hit: bool) -> None:
+        counts = self._cache.setdefault(name, [0, 0])
+        counts[0 if hit else 1] += 1
+
+    def fps(self, view: Hashable) -> float:
+        """
+        view の直近 FPS_WINDOW 秒間のペイント回数から求めた FPS。
+        """
+        frame_times = self._frame_times.get(view)
+        if not frame_times:
+            return 0.0
+        since = time.perf_counter() - FPS_WINDOW
+        return sum(1 for t in frame_times if t >= since) / FPS_WINDOW
+
+    def cache_hit_rate(self, name: str) -> float | None:
+        hits, misses = self._cache.get(name, (0, 0))
+        return hits / (hits + misses) if hits + misses else None
+
+    def clear(self) -> None:
+        self.render_ms.clear()
+        self.paint_ms.clear()
+        for samples in self.latency_ms.values():
+            samples.clear()
+        self._frame_times.clear()
+        self._pending_inputs.clear()
+        self._cache.clear()
+
+    def format_lines(self, view: Hashable, cache_names: Dict[str, str]) -> List[str]:
+        """
+        HUD に表示する行 (時間は p50/p95 の ms)。
+
+        Args:
+            view (Hashable): FPS を表示するビュー。
+            cache_names (Dict[str, str]): record_cache の名前と表示名。
+        """
+        lines = [
+            f"{self.fps(view):.0f} fps",
+            f"描画 {_percentiles(self.render_ms)} ms",
+            f"ペイント {_percentiles(self.paint_ms)} ms",
+        ]
+        for kind, label in INPUT_KINDS.items():
+            lines.append(f"{label}→表示 {_percentiles(self.latency_ms[kind])} ms")
+        for name, label in cache_names.items():
+            rate = self.cache_hit_rate(name)
+            lines.append(f"{label} {'-' if rate is None else f'{rate * 100:.0f}%'}")
+        return lines
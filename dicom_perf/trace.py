@@ -0,0 +1,172 @@
+# dicom_perf/trace.py
+
+import json
+import os
+import threading
+import time
+from collections import deque
+from functools import wraps
+from typing import Dict, List
+
+import numpy as np
+
+# 環境変数で起動時から記録する (DICOM_VIEWER_TRACE=1)。
+# DICOM_VIEWER_TRACE_FILE を指定すると、ビューワー終了時にトレースを書き出す
+TRACE_ENV = 'DICOM_VIEWER_TRACE'
+TRACE_FILE_ENV = 'DICOM_VIEWER_TRACE_FILE'
+DEFAULT_MAX_EVENTS = 1_000_000
+
+
+class _NullSpan:
+    # 記録が無効のときに返す何もしないスパン (呼び出し側のコストは属性参照1回程度)
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'args', 'start')
+
+    def __init__(self, tracer: 'Tracer', name: str, args: Dict | None):
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter_ns()
+        self.tracer._add(('X', self.name, self.start, end - self.start, threading.get_ident(), self.args))
+        return False
+
+
+class Tracer:
+    """
+    処理の区間 (スパン) とカウンタを記録し、Chrome/Perfetto のトレース形式で書き出す。
+
+    無効のときは span が共有の何もしないオブジェクトを返し、count は何もしないため、
+    計測箇所を残したままでもほぼ負荷が無い。イベントは max_events 件まで保持し、
+    超えた分は古いものから捨てる。複数のスレッドから同時に記録してよい。
+    """
+
+    def __init__(self, enabled: bool = False, max_events: int = DEFAULT_MAX_EVENTS):
+        self.enabled = enabled
+        self._events = deque(maxlen=max_events)
+        self._counters: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter_ns()
+
+    def set_enabled(self, enabled: bool) -> None:
+        self.enabled = enabled
+
+    def span(self, name: str, **args):
+        """
+        with tracer.span('update_image'): ... の形で区間の時間を記録する。
+        """
+        if not self.enabled:
+            return _NULL_SPAN
+        return _Span(self, name, args or None)
+
+    def count(self, name: str, value: float = 1) -> None:
+        """
+        カウンタに value を加え、その時点の値をトレースに記録する。
+        """
+        if not self.enabled:
+            return
+        with self._lock:
+            total = self._counters.get(name, 0) + value
+            self._counters[name] = total
+        self._add(('C', name, time.perf_counter_ns(), 0, threading.get_ident(), {name: total}))
+
+    def _add(self, event) -> None:
+        # deque.append はスレッドセーフ
+        self._events.append(event)
+
+    @property
+    def counters(self) -> Dict[str, float]:
+        return dict(self._counters)
+
+    def clear(self) -> None:
+        self._events.clear()
+        self._counters.clear()
+        self._origin = time.perf_counter_ns()
+
+    def chrome_trace(self) -> Dict:
+        """
+        Chrome (chrome://tracing) / Perfetto で開けるトレースイベント形式の辞書を返す。
+        """
+        pid = os.getpid()
+        events = []
+        for ph, name, start, dur, tid, args in list(self._events):
+            event = {'name': name, 'ph': ph, 'ts': (start - self._origin) / 1000, 'pid': pid, 'tid': tid}
+            if ph == 'X':
+                event['dur'] = dur / 1000
+            if args:
+                event['args'] = args
+            events.append(event)
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.chrome_trace(), f)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        スパン名ごとの回数・合計・平均・p50・p95・最大 (ms) を返す。
+        """
+        durations: Dict[str, List[int]] = {}
+        for ph, name, _, dur, _, _ in list(self._events):
+            if ph == 'X':
+                durations.setdefault(name, []).append(dur)
+
+        result = {}
+        for name, values in durations.items():
+            ms = np.asarray(values) / 1e6
+            result[name] = {
+                'count': len(values),
+                'total_ms': float(ms.sum()),
+                'mean_ms': float(ms.mean()),
+                'p50_ms': float(np.percentile(ms, 50)),
+                'p95_ms': float(np.percentile(ms, 95)),
+                'max_ms': float(ms.max()),
+            }
+        return result
+
+    def format_summary(self) -> str:
+        """
+        summary を合計時間の長い順に並べた表 (文字列) にする。
+        """
+        lines = [f"{'区間':28s} {'回数':>7s} {'合計ms':>10s} {'平均ms':>9s} {'p50ms':>9s} {'p95ms':>9s} {'最大ms':>9s}"]
+        rows = sorted(self.summary().items(), key=lambda item: item[1]['total_ms'], reverse=True)
+        for name, s in rows:
+            lines.append(f"{name:28s} {s['count']:7d} {s['total_ms']:10.2f} {s['mean_ms']:9.3f} "
+                         f"{s['p50_ms']:9.3f} {s['p95_ms']:9.3f} {s['max_ms']:9.3f}")
+        for name, value in sorted(self._counters.items()):
+            lines.append(f"{name:28s} {value:7g}")
+        return "\n".join(lines)
+
+
+def traced(name: str):
+    """
+    関数全体をスパンとして記録するデコレータ。無効のときは enabled の確認1回だけ。
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not tracer.enabled:
+                return func(*args, **kwargs)
+            with _Span(tracer, name, None):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# アプリケーション全体で共有するトレーサー
+tracer = Tracer(enabled=os.environ.get(TRACE_ENV, '') not in ('', '0'))
@@ -1,6 +1,10 @@
 import pydicom
 import numpy as np
-from typing import Dict, Any, Tuple
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterator, List, Tuple
+
+from dicom_read import read_series
 
 # ... (get_all_header_infoなどの他の関数は既に存在しているものとする) ...
 
@@ -42,4 +46,81 @@ def get_raw_pixel_data(filepath: str) -> Tuple[np.ndarray | None, Dict[str, floa
     }
     
     # 生の配列とRescale情報を返す
-    return raw_array, rescale_info
\ No newline at end of file
+    return raw_array, rescale_info
+
+
+def scan_series(source: str | List[str], workers: int | None = None) -> List[read_series.SliceHeader] | None:
+    """
+    ディレクトリ、またはファイルパスの一覧のヘッダだけを読み込み、シリーズの並び順を決める。
+    複数のシリーズが含まれる場合は、最もスライス数の多いシリーズを選ぶ。
+
+    スライスごとの Rescale 値は read_series.rescale_arrays で (スライス数,) の配列にできる。
+
+    Args:
+        source (str | List[str]): DICOMフォルダのパス、またはDICOMファイルのパス一覧。
+        workers (int | None): ヘッダ読み込みのワーカー数。None の場合は CPU コア数。
+
+    Returns:
+        List[read_series.SliceHeader] | None: スライス位置順のヘッダ。画像を含むファイルが
+            無い場合は None。
+    """
+    filepaths = read_series.list_dicom_files(source) if isinstance(source, str) else list(source)
+    if not filepaths:
+        print(f"DICOMファイルが見つかりませんでした: {source}")
+        return None
+
+    headers = read_series.select_series(read_series.prescan_headers(filepaths, workers=workers))
+    if not headers:
+        print(f"画像を含むDICOMファイルが見つかりませんでした: {source}")
+        return None
+    return headers
+
+
+def iter_raw_slices(headers: List[read_series.SliceHeader], workers: int | None = None,
+                    max_in_flight: int | None = None) -> Iterator[Tuple[int, np.ndarray]]:
+    """
+    シリーズのスライスをワーカープールでデコードし、スライス位置順に返す。
+    デコード済みで未取得のスライスは max_in_flight 枚までに抑えるため、
+    シリーズ全体の大きさに関わらずメモリ使用量は一定になる。
+
+    Args:
+        headers (List[read_series.SliceHeader]): scan_series の結果。
+        workers (int | None): デコードのワーカー数。None の場合は CPU コア数。
+        max_in_flight (int | None): 同時にデコードするスライス数の上限。None の場合は workers の2倍。
+
+    Yields:
+        Tuple[int, np.ndarray]: (スライス番号, 生ピクセル値の2次元配列)。HU値へは
+            read_series.rescale_arrays(headers) の Slope/Intercept で変換する。
+    """
+    workers = read_series.resolve_workers(workers, len(headers))
+    max_in_flight = max_in_flight or 2 * workers
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for z, header in enumerate(headers):
+            pending.append((z, pool.submit(read_series.decode_raw_slice, header.filepath)))
+            if len(pending) >= max_in_flight:
+                z_done, future = pending.popleft()
+                yield z_done, future.result()
+        while pending:
+            z_done, future = pending.popleft()
+            yield z_done, future.result()
+
+
+def read_raw_volume(headers: List[read_series.SliceHeader], out: np.ndarray | None = None,
+                    workers: int | None = None) -> read_series.SeriesVolume:
+    """
+    シリーズ全体を (スライス数, Rows, Columns) の生ピクセル値のボリュームに読み込む。
+    読み込みは read_series.load_series_volume と同じで、ワーカーは各スライスを
+    ボリュームの自分の位置へ直接書き込む。
+
+    Args:
+        headers (List[read_series.SliceHeader]): scan_series の結果。
+        out (np.ndarray | None): 書き込み先の配列 ((スライス数, Rows, Columns) の形状)。
+            メモリマップなど呼び出し側で確保した配列を渡せる。None の場合は格納形式で確保する。
+        workers (int | None): デコードのワーカー数。None の場合は CPU コア数。
+
+    Returns:
+        read_series.SeriesVolume: raw が out (または新しく確保した配列) のボリューム。
+            スライスごとの Rescale 値は slopes / intercepts に入る。
+    """
+    return read_series.load_series_volume(headers, workers=workers, out=out)
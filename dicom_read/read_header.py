@@ -1,25 +1,41 @@
 # dicom_read/read_header.py
 
+import os
 import pydicom
-from typing import Dict, Any, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pydicom.filereader import read_file_meta_info
+from pydicom.multival import MultiValue
+from typing import Dict, Any, Iterator, List, Tuple
 
 NON_COMPRESSED_UIDS = {
     '1.2.840.10008.1.2',    # Implicit VR Little Endian
     '1.2.840.10008.1.2.1'   # Explicit VR Little Endian
 }
 
+# get_all_header_info で読み込むタグ (ピクセルデータは読まない)
+HEADER_TAGS = [
+    'WindowCenter', 'WindowWidth',
+    'SmallestImagePixelValue', 'LargestImagePixelValue',
+    'PatientName', 'PatientID', 'StudyDate', 'Modality',
+]
+
+# ヘッダ読み込みは I/O 待ちが中心のため、CPU コア数より多いスレッドで読む
+DEFAULT_HEADER_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+DEFAULT_CHUNK_SIZE = 256
+
 def get_transfer_syntax_uid(filepath: str) -> bool:
     """
     ファイルパスからDICOMファイルを読み込み、Transfer Syntax UIDを取得し、
     エンディアン情報を返す関数
+    (File Meta Information だけを読み、データセット本体は読まない)
     """
     try:
-        ds = pydicom.dcmread(filepath)
+        file_meta = read_file_meta_info(filepath)
     except Exception as e:
         print(f"DICOMファイル読み込みエラー: {e}")
         return False
 
-    transfer_syntax = ds.file_meta.TransferSyntaxUID
+    transfer_syntax = file_meta.TransferSyntaxUID
     print(transfer_syntax)
 
     if transfer_syntax.is_little_endian:
@@ -31,19 +47,20 @@ def get_transfer_syntax_uid(filepath: str) -> bool:
 def get_all_header_info(filepath: str) -> Dict[str, Any] | None:
     """
     指定されたDICOMファイルから、要求されたすべての主要なヘッダ情報とエンディアン情報を取得する。
+    ピクセルデータは読まず、HEADER_TAGS のタグだけを読み込む。
     """
     try:
-        # ファイルを読み込む
-        ds = pydicom.dcmread(filepath)
+        # ファイルを読み込む (File Meta Information と必要なタグのみ)
+        ds = pydicom.dcmread(filepath, stop_before_pixels=True, specific_tags=HEADER_TAGS)
     except Exception as e:
         print(f"DICOMファイル読み込みエラー: {e}")
         return None
-    
+
     # 1. エンディアン情報の取得
     transfer_syntax = ds.file_meta.TransferSyntaxUID
     # 'is_little_endian'属性を利用して、Little EndianかBig Endianかを判定
     endian_info = "Little Endian" if transfer_syntax.is_little_endian else "Big Endian"
-    
+
 # --- 2. WC/WWの取得 ---
     # MultiValueの場合の処理と、タグが存在しない場合のデフォルト値設定
     try:
@@ -72,7 +89,7 @@ def get_all_header_info(filepath: str) -> Dict[str, Any] | None:
         'StudyDate': getattr(ds, 'StudyDate', 'N/A'),
         'Modality': getattr(ds, 'Modality', 'N/A'),
     }
-    
+
     # --- 6. すべての情報を統合して返す ---
     all_info = {
         'endian': endian_info,
@@ -85,5 +102,32 @@ def get_all_header_info(filepath: str) -> Dict[str, Any] | None:
         'pixel_max': pixel_max, # 新規追加
         'file_path': filepath
     }
-    
-    return all_info
\ No newline at end of file
+
+    return all_info
+
+
+def iter_all_header_info(filepaths: List[str], workers: int | None = None,
+                         chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, Any] | None]:
+    """
+    複数のDICOMファイルのヘッダ情報をスレッドプールで読み込み、入力順に1件ずつ返す。
+
+    Args:
+        filepaths (List[str]): DICOMファイルのパス一覧。
+        workers (int | None): スレッド数。None の場合は DEFAULT_HEADER_WORKERS。
+        chunk_size (int): 一度にスレッドプールへ渡すファイル数。先読みする結果の数の上限になる。
+
+    Yields:
+        Dict[str, Any] | None: get_all_header_info の結果 (読み込めないファイルは None)。
+    """
+    workers = workers or DEFAULT_HEADER_WORKERS
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for start in range(0, len(filepaths), chunk_size):
+            yield from pool.map(get_all_header_info, filepaths[start:start + chunk_size])
+
+
+def get_all_header_info_batch(filepaths: List[str], workers: int | None = None) -> List[Dict[str, Any] | None]:
+    """
+    複数のDICOMファイルのヘッダ情報をスレッドプールで読み込み、入力順のリストで返す。
+    読み込めないファイルの要素は None になる。
+    """
+    return list(iter_all_header_info(filepaths, workers))
@@ -0,0 +1,439 @@
+# dicom_read/read_series.py
+
+import os
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Iterator, List, Tuple
+
+import numpy as np
+import pydicom
+
+from dicom_read.volume_stats import VolumeStatistics
+from dicom_perf.trace import tracer, traced
+
+EXECUTOR_TYPES = ('thread', 'process')
+DEFAULT_SLAB_SIZE = 16
+
+# プリスキャンで読み込むタグ (ピクセルデータ以外の必要最小限)
+PRESCAN_TAGS = [
+    'SeriesInstanceUID', 'SeriesNumber', 'SeriesDescription', 'Modality',
+    'SliceLocation', 'ImagePositionPatient', 'ImageOrientationPatient',
+    'Rows', 'Columns', 'PixelSpacing', 'SliceThickness',
+    'RescaleSlope', 'RescaleIntercept', 'BitsAllocated', 'PixelRepresentation',
+]
+
+
+@dataclass
+class SliceHeader:
+    """
+    プリスキャンで得た1ファイル分のヘッダ情報。
+    """
+    filepath: str
+    series_uid: str
+    location: float
+    rows: int
+    cols: int
+    slope: float
+    intercept: float
+    bits_allocated: int
+    pixel_representation: int
+    pixel_spacing: List[float]
+    slice_thickness: float
+    orientation: Tuple[float, ...] | None
+    transfer_syntax_uid: str
+    series_number: int | None = None
+    series_description: str = ''
+    modality: str = ''
+
+
+class SeriesVolume:
+    """
+    スライス位置順に並べた生ピクセル値のボリュームと、スライスごとのRescale値。
+
+    ボリュームは DICOM の格納形式 (int16 / uint16 など) のまま保持し、HU値は
+    表示や統計などで float が必要になった断面についてのみ遅延的に計算する。
+    """
+
+    def __init__(self, raw: np.ndarray, slopes: np.ndarray, intercepts: np.ndarray,
+                 files: List[str], header: pydicom.Dataset, series_uid: str = '',
+                 stats: VolumeStatistics | None = None):
+        self.raw = raw                  # (z, y, x) の生ピクセル値
+        self.slopes = slopes            # (z,) float32
+        self.intercepts = intercepts    # (z,) float32
+        self.files = files
+        self.header = header            # 先頭スライスのヘッダ (ピクセルデータなし)
+        self.series_uid = series_uid
+        # 先頭から何枚目までデコード済みか (段階的読み込み中は shape[0] より小さい)
+        self.loaded_slices = raw.shape[0]
+        # デコード時にスライスごとに集計する統計 (HUヒストグラムなど)
+        self.stats = stats if stats is not None else VolumeStatistics(raw.shape[0])
+
+    @property
+    def is_complete(self) -> bool:
+        return self.loaded_slices >= self.raw.shape[0]
+
+    @property
+    def shape(self) -> Tuple[int, int, int]:
+        return self.raw.shape
+
+    @property
+    def nbytes(self) -> int:
+        return self.raw.nbytes
+
+    @property
+    def uniform_rescale(self) -> Tuple[float, float] | None:
+        """
+        全スライスの Slope/Intercept が同じ場合はその値、異なる場合は None。
+        """
+        if np.all(self.slopes == self.slopes[0]) and np.all(self.intercepts == self.intercepts[0]):
+            return float(self.slopes[0]), float(self.intercepts[0])
+        return None
+
+    def plane_raw(self, plane: str, index: int) -> np.ndarray:
+        """
+        指定断面の生ピクセル値を返す (コピーしないビュー)。
+        Coronal/Sagittal は頭側が上になるよう上下反転する。
+        """
+        if plane == "Axial":
+            return self.raw[index, :, :]
+        if plane == "Coronal":
+            return np.flipud(self.raw[:, index, :])
+        if plane == "Sagittal":
+            return np.flipud(self.raw[:, :, index])
+        raise ValueError(f"未対応の断面です: {plane}")
+
+    def plane_rescale(self, plane: str, index: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        plane_raw の結果にブロードキャストできる形で Slope/Intercept を返す。
+        Axial はスカラー、Coronal/Sagittal は (z, 1) の列。
+        """
+        if plane == "Axial":
+            return self.slopes[index], self.intercepts[index]
+        return self.slopes[::-1, None], self.intercepts[::-1, None]
+
+    def plane_hu(self, plane: str, index: int) -> np.ndarray:
+        """
+        指定断面をHU値 (float32) に変換して返す。
+        """
+        slope, intercept = self.plane_rescale(plane, index)
+        return self.plane_raw(plane, index).astype(np.float32) * slope + intercept
+
+    def to_hu(self, raw_values):
+        """
+        生ピクセル値 (スカラーまたは配列) をHU値へ変換する。Rescale が一様な場合のみ使える。
+        """
+        slope, intercept = self.uniform_rescale
+        return np.asarray(raw_values, dtype=np.float64) * slope + intercept
+
+    def hu_range(self) -> Tuple[float, float]:
+        """
+        ボリューム全体 (読み込み中はデコード済みの範囲) のHU値の最小・最大を返す。
+        読み込み時に集計したスライスごとの統計があればそこから O(スライス数) で求める。
+        """
+        if self.stats.count > 0:
+            summary = self.stats.volume_summary()
+            return summary['min'], summary['max']
+        n = self.loaded_slices
+        raw = self.raw[:n]
+        if self.uniform_rescale is not None:
+            lo, hi = self.to_hu([raw.min(), raw.max()])
+            return float(min(lo, hi)), float(max(lo, hi))
+        mins = raw.min(axis=(1, 2)) * self.slopes[:n] + self.intercepts[:n]
+        maxs = raw.max(axis=(1, 2)) * self.slopes[:n] + self.intercepts[:n]
+        return float(min(mins.min(), maxs.min())), float(max(mins.max(), maxs.max()))
+
+    def hu_percentile(self, q) -> np.ndarray:
+        """
+        ボリューム全体 (読み込み中はデコード済みの範囲) のHU値のパーセンタイルを返す。
+        読み込み時に集計したHUヒストグラムがあればそこから O(ビン数) で求める。
+        """
+        if self.stats.count > 0:
+            return self.stats.percentile(q)
+        n = self.loaded_slices
+        if self.uniform_rescale is not None:
+            return np.sort(self.to_hu(np.percentile(self.raw[:n], q)))
+        hu = self.raw[:n].astype(np.float32) * self.slopes[:n, None, None] + self.intercepts[:n, None, None]
+        return np.percentile(hu, q)
+
+
+def list_dicom_files(folder_path: str) -> List[str]:
+    """
+    フォルダ直下の .dcm ファイルのパス一覧を取得する。
+    """
+    return [os.path.join(folder_path, f)
+            for f in os.listdir(folder_path)
+            if f.lower().endswith('.dcm')]
+
+
+def get_slice_location(ds: pydicom.Dataset) -> float:
+    """
+    スライスの並び替えに使う位置を取得する。
+    SliceLocation が無い場合は ImagePositionPatient の Z 座標を使う。
+    """
+    location = getattr(ds, 'SliceLocation', None)
+    if location is None:
+        location = getattr(ds, 'ImagePositionPatient', [0, 0, 0])[2]
+    return float(location)
+
+
+def _to_float_list(value, default: List[float]) -> List[float]:
+    if value is None:
+        return list(default)
+    return [float(v) for v in value]
+
+
+def read_slice_header(filepath: str) -> SliceHeader | None:
+    """
+    ピクセルデータを読まずに、並び替えとボリューム構築に必要なタグだけを読み込む。
+    画像を持たないファイル (Rows/Columns が無い) の場合は None を返す。
+    """
+    ds = pydicom.dcmread(filepath, stop_before_pixels=True, specific_tags=PRESCAN_TAGS)
+    if getattr(ds, 'Rows', None) is None or getattr(ds, 'Columns', None) is None:
+        return None
+
+    transfer_syntax = ds.file_meta.TransferSyntaxUID if hasattr(ds, 'file_meta') else None
+    orientation = getattr(ds, 'ImageOrientationPatient', None)
+    return SliceHeader(
+        filepath=filepath,
+        series_uid=str(getattr(ds, 'SeriesInstanceUID', '')),
+        location=get_slice_location(ds),
+        rows=int(ds.Rows),
+        cols=int(ds.Columns),
+        slope=float(getattr(ds, 'RescaleSlope', 1.0)),
+        intercept=float(getattr(ds, 'RescaleIntercept', 0.0)),
+        bits_allocated=int(getattr(ds, 'BitsAllocated', 16)),
+        pixel_representation=int(getattr(ds, 'PixelRepresentation', 0)),
+        pixel_spacing=_to_float_list(getattr(ds, 'PixelSpacing', None), [1.0, 1.0]),
+        slice_thickness=float(getattr(ds, 'SliceThickness', 1.0) or 1.0),
+        orientation=tuple(round(float(v), 4) for v in orientation) if orientation is not None else None,
+        transfer_syntax_uid=str(transfer_syntax) if transfer_syntax is not None else '',
+        series_number=int(ds.SeriesNumber) if getattr(ds, 'SeriesNumber', None) is not None else None,
+        series_description=str(getattr(ds, 'SeriesDescription', '')),
+        modality=str(getattr(ds, 'Modality', '')),
+    )
+
+
+@traced('prescan_headers')
+def prescan_headers(filepaths: List[str], workers: int | None = None) -> List[SliceHeader]:
+    """
+    フォルダ内の全ファイルのヘッダだけを並列に読み込む (プリスキャン)。
+
+    Args:
+        filepaths (List[str]): DICOMファイルのパス一覧。
+        workers (int | None): ワーカー数。None の場合は CPU コア数。
+
+    Returns:
+        List[SliceHeader]: 入力順のヘッダ一覧。画像を持たないファイルは除外される。
+    """
+    workers = resolve_workers(workers, len(filepaths))
+    if workers == 1:
+        headers = [read_slice_header(f) for f in filepaths]
+    else:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            headers = list(pool.map(read_slice_header, filepaths))
+    return [h for h in headers if h is not None]
+
+
+def group_series(headers: List[SliceHeader]) -> List[List[SliceHeader]]:
+    """
+    プリスキャン結果を、1つのボリュームとして積み重ねられるスライスのグループに分ける。
+
+    SeriesInstanceUID に加えて、画像の向き (ImageOrientationPatient) と画像サイズが
+    同じものを1グループとする。位置決め画像や、同じフォルダ内の別の再構成は別グループになる。
+
+    Returns:
+        List[List[SliceHeader]]: スライス位置順に並べたグループの一覧。スライス数の多い順
+            (同数の場合は先に見つかったもの)。
+    """
+    groups = {}
+    for h in headers:
+        groups.setdefault((h.series_uid, h.orientation, h.rows, h.cols), []).append(h)
+    ordered = sorted(groups.values(), key=len, reverse=True)
+    return [sort_slices(group) for group in ordered]
+
+
+def select_series(headers: List[SliceHeader]) -> List[SliceHeader]:
+    """
+    プリスキャン結果から表示するシリーズを選び、スライス位置順に並べて返す。
+    最もスライス数の多いグループ (group_series を参照) を選ぶ。
+    """
+    groups = group_series(headers)
+    return groups[0] if groups else []
+
+
+def orientation_label(orientation: Tuple[float, ...] | None) -> str:
+    """
+    ImageOrientationPatient から断面の種類 (Axial / Coronal / Sagittal) を判定する。
+    斜めの断面は法線に最も近い軸で判定する。向きが無い場合は空文字。
+    """
+    if orientation is None or len(orientation) != 6:
+        return ''
+    normal = np.cross(orientation[:3], orientation[3:])
+    return ("Sagittal", "Coronal", "Axial")[int(np.argmax(np.abs(normal)))]
+
+
+def sort_slices(headers: List[SliceHeader]) -> List[SliceHeader]:
+    # 位置が同じ場合は入力順を保つ (安定ソート)
+    return sorted(headers, key=lambda h: h.location)
+
+
+def rescale_arrays(headers: List[SliceHeader]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    ヘッダの並び順どおりの Slope/Intercept を (スライス数,) の float32 配列で返す。
+    """
+    slopes = np.array([h.slope for h in headers], dtype=np.float32)
+    intercepts = np.array([h.intercept for h in headers], dtype=np.float32)
+    return slopes, intercepts
+
+
+def pixel_dtype(header: SliceHeader) -> np.dtype:
+    """
+    BitsAllocated/PixelRepresentation から、生ピクセル値を保持する dtype を決める。
+    """
+    bits = 8 if header.bits_allocated <= 8 else 16 if header.bits_allocated <= 16 else 32
+    return np.dtype(f"{'int' if header.pixel_representation == 1 else 'uint'}{bits}")
+
+
+def decode_raw_slice(filepath: str) -> np.ndarray:
+    """
+    1ファイルのピクセルを生ピクセル値の2次元配列としてデコードする (HU変換はしない)。
+    """
+    # pydicom の pixel_array は Big Endian でもバイトオーダー付きの dtype (>i2 など) で
+    # 正しい値を返すため、バイトスワップは不要 (代入・型変換でネイティブになる)
+    with tracer.span('dcmread'):
+        ds = pydicom.dcmread(filepath)
+    with tracer.span('pixel_decode'):
+        return ds.pixel_array
+
+
+def _decode_into(volume: SeriesVolume, z: int) -> None:
+    # ワーカーがボリューム内の自分の位置へ直接書き込み、そのスライスの統計を集計する
+    # Dataset はここで破棄されるため、PixelData のバイト列はボリュームに残らない
+    volume.raw[z] = decode_raw_slice(volume.files[z])
+    _collect_slice_stats(volume, z)
+
+
+@traced('slice_stats')
+def _collect_slice_stats(volume: SeriesVolume, z: int) -> None:
+    volume.stats.add_slice(z, volume.raw[z], volume.slopes[z], volume.intercepts[z])
+
+
+def resolve_workers(workers: int | None, n_tasks: int) -> int:
+    """
+    ワーカー数を決める。None の場合は CPU コア数で、タスク数を超えない。
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    return max(1, min(int(workers), n_tasks))
+
+
+def _create_executor(executor: str, workers: int):
+    if executor == 'thread':
+        return ThreadPoolExecutor(max_workers=workers)
+    if executor == 'process':
+        return ProcessPoolExecutor(max_workers=workers)
+    raise ValueError(f"未対応のexecutor指定です: {executor} ({'/'.join(EXECUTOR_TYPES)} のいずれか)")
+
+
+@traced('allocate_volume')
+def allocate_series_volume(headers: List[SliceHeader], out: np.ndarray | None = None) -> SeriesVolume:
+    """
+    プリスキャン済みのシリーズについて、スライス位置順の空のボリュームを確保する。
+
+    ボリューム (z, y, x) はヘッダの画像サイズと格納形式から一度だけ確保する。
+    out を渡した場合は確保せずにその配列 (メモリマップなど) へ書き込む。
+    ピクセルは iter_decode_slabs でデコードするまで 0 (out の場合は元の値) のままで、loaded_slices は 0。
+    """
+    if not headers:
+        raise ValueError("DICOMファイルが指定されていません。")
+
+    sorted_headers = sort_slices(headers)
+    sorted_files = [h.filepath for h in sorted_headers]
+
+    shapes = {(h.rows, h.cols) for h in sorted_headers}
+    if len(shapes) != 1:
+        raise ValueError(f"画像サイズが一致しないスライスが含まれています: {sorted(shapes)}")
+    rows, cols = shapes.pop()
+
+    shape = (len(sorted_headers), rows, cols)
+    if out is not None:
+        if out.shape != shape:
+            raise ValueError(f"配列の形状がシリーズと一致しません: {out.shape} != {shape}")
+        raw = out
+    else:
+        # 格納形式のまま確保する (np.zeros は実際に書き込まれたページだけがメモリを使う)
+        dtype = np.result_type(*{pixel_dtype(h) for h in sorted_headers})
+        raw = np.zeros(shape, dtype=dtype)
+    slopes, intercepts = rescale_arrays(sorted_headers)
+
+    first_ds = pydicom.dcmread(sorted_files[0], stop_before_pixels=True)
+    volume = SeriesVolume(raw, slopes, intercepts, sorted_files, first_ds,
+                          series_uid=sorted_headers[0].series_uid)
+    volume.loaded_slices = 0
+    return volume
+
+
+def iter_decode_slabs(volume: SeriesVolume, workers: int | None = None, executor: str = 'thread',
+                      slab_size: int = DEFAULT_SLAB_SIZE) -> Iterator[Tuple[int, int]]:
+    """
+    ボリュームの先頭から slab_size 枚ずつピクセルを並列にデコードし、
+    スラブの書き込みが終わるたびに (start, stop) を返すジェネレータ。
+
+    各ワーカーはデコードした生ピクセル値をボリューム内の自分の位置へ直接書き込む。
+    スラブは先頭から順に完了するため、volume.loaded_slices は常に連続した範囲を表す。
+    """
+    n = volume.shape[0]
+    files = volume.files
+    workers = resolve_workers(workers, n)
+    slab_size = max(1, int(slab_size))
+
+    if workers == 1:
+        for start in range(volume.loaded_slices, n, slab_size):
+            stop = min(start + slab_size, n)
+            for z in range(start, stop):
+                _decode_into(volume, z)
+            volume.loaded_slices = stop
+            yield start, stop
+        return
+
+    with _create_executor(executor, workers) as pool:
+        for start in range(volume.loaded_slices, n, slab_size):
+            stop = min(start + slab_size, n)
+            if executor == 'process':
+                # 別プロセスからは共有できないため、結果を受け取った側で配置する
+                for z, raw_slice in zip(range(start, stop), pool.map(decode_raw_slice, files[start:stop])):
+                    volume.raw[z] = raw_slice
+                    _collect_slice_stats(volume, z)
+            else:
+                futures = [pool.submit(_decode_into, volume, z) for z in range(start, stop)]
+                for future in futures:
+                    future.result()
+            volume.loaded_slices = stop
+            yield start, stop
+
+
+def load_series_volume(headers: List[SliceHeader], workers: int | None = None,
+                       executor: str = 'thread', out: np.ndarray | None = None) -> SeriesVolume:
+    """
+    プリスキャン済みのシリーズについて、ピクセルを並列にデコードしてボリュームを作成する。
+
+    ボリューム (z, y, x) はヘッダの画像サイズと格納形式から一度だけ確保し、各ワーカーが
+    デコードした生ピクセル値をスライス位置順の位置へ直接書き込む。HU変換は行わず、
+    Slope/Intercept はスライスごとの配列として保持するため、読み込み時のピークメモリは
+    ほぼ生ピクセルのボリューム1つ分になる。
+    並び順は安定ソートで決まるため、ワーカー数や実行方式によらず結果は同一になる。
+
+    Args:
+        headers (List[SliceHeader]): 読み込むシリーズのヘッダ (select_series の結果など)。
+        workers (int | None): ワーカー数。None の場合は CPU コア数。1 の場合は逐次処理。
+        executor (str): 'thread' (スレッドプール) または 'process' (プロセスプール)。
+        out (np.ndarray | None): 書き込み先の配列 (メモリマップなど)。None の場合は確保する。
+
+    Returns:
+        SeriesVolume: 生ピクセルのボリュームとRescale値、ソート済みファイル一覧。
+    """
+    volume = allocate_series_volume(headers, out=out)
+    # 全体を1スラブとして投入し、プールの並列度を最大限に使う
+    for _ in iter_decode_slabs(volume, workers, executor, slab_size=volume.shape[0]):
+        pass
+    return volume
@@ -0,0 +1,284 @@
+# dicom_read/series_index.py
+
+import os
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import closing
+from typing import Callable, Dict, List, Tuple
+
+import pydicom
+
+from dicom_read.read_series import (
+    PRESCAN_TAGS, SliceHeader, resolve_workers, _to_float_list, get_slice_location,
+)
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".ctmr_viewer_cache", "index.sqlite3")
+
+# 索引に記録するタグ (プリスキャンのタグ + 患者・検査・インスタンスの識別情報)
+INDEX_TAGS = PRESCAN_TAGS + [
+    'PatientName', 'PatientID', 'StudyInstanceUID', 'StudyDate', 'StudyDescription',
+    'SOPInstanceUID', 'InstanceNumber',
+]
+
+# PixelData (7FE0,0010) のタグのバイト列 (Little Endian / Big Endian)
+_PIXEL_DATA_TAGS = (b'\xe0\x7f\x10\x00', b'\x7f\xe0\x00\x10')
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS instances (
+    path TEXT PRIMARY KEY,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    patient_name TEXT,
+    patient_id TEXT,
+    study_uid TEXT,
+    study_date TEXT,
+    study_description TEXT,
+    series_uid TEXT,
+    series_number INTEGER,
+    series_description TEXT,
+    modality TEXT,
+    sop_uid TEXT,
+    instance_number INTEGER,
+    location REAL,
+    rows INTEGER,
+    cols INTEGER,
+    slope REAL,
+    intercept REAL,
+    bits_allocated INTEGER,
+    pixel_representation INTEGER,
+    pixel_spacing TEXT,
+    slice_thickness REAL,
+    orientation TEXT,
+    transfer_syntax_uid TEXT,
+    pixel_data_offset INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_instances_series ON instances (series_uid);
+CREATE INDEX IF NOT EXISTS idx_instances_study ON instances (study_uid);
+"""
+
+_COLUMNS = [
+    'path', 'mtime_ns', 'size', 'patient_name', 'patient_id', 'study_uid', 'study_date',
+    'study_description', 'series_uid', 'series_number', 'series_description', 'modality',
+    'sop_uid', 'instance_number', 'location', 'rows', 'cols', 'slope', 'intercept',
+    'bits_allocated', 'pixel_representation', 'pixel_spacing', 'slice_thickness',
+    'orientation', 'transfer_syntax_uid', 'pixel_data_offset',
+]
+
+
+def _parse_orientation(text: str | None) -> Tuple[float, ...] | None:
+    return tuple(float(v) for v in text.split('\\')) if text else None
+
+
+def _optional_int(value) -> int | None:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def read_index_record(filepath: str) -> Dict | None:
+    """
+    ピクセルデータを読まずにヘッダだけを読み込み、索引の1行分を返す。
+
+    Args:
+        filepath (str): DICOMファイルのパス。
+
+    Returns:
+        Dict | None: 列名と値の辞書。DICOMとして読めないファイル、値が壊れているファイルや、
+            画像を持たないファイル (Rows/Columns が無い) の場合は None。
+    """
+    # 共有ドライブには壊れた値 (数値でない DS など) を持つファイルも混ざるため、
+    # どんな例外でもそのファイルだけを飛ばし、スキャン全体は止めない
+    try:
+        return _read_index_record(filepath)
+    except Exception as e:
+        print(f"索引作成エラー ({filepath}): {e}")
+        return None
+
+
+def _read_index_record(filepath: str) -> Dict | None:
+    st = os.stat(filepath)
+    with open(filepath, 'rb') as f:
+        ds = pydicom.dcmread(f, stop_before_pixels=True, specific_tags=INDEX_TAGS)
+        # 読み込みが止まった位置が PixelData 要素の先頭になる
+        offset = f.tell()
+        pixel_data_offset = offset if f.read(4) in _PIXEL_DATA_TAGS else None
+    if getattr(ds, 'Rows', None) is None or getattr(ds, 'Columns', None) is None:
+        return None
+
+    transfer_syntax = ds.file_meta.TransferSyntaxUID if hasattr(ds, 'file_meta') else None
+    orientation = getattr(ds, 'ImageOrientationPatient', None)
+    return {
+        'path': os.path.abspath(filepath),
+        'mtime_ns': st.st_mtime_ns,
+        'size': st.st_size,
+        'patient_name': str(getattr(ds, 'PatientName', '')),
+        'patient_id': str(getattr(ds, 'PatientID', '')),
+        'study_uid': str(getattr(ds, 'StudyInstanceUID', '')),
+        'study_date': str(getattr(ds, 'StudyDate', '')),
+        'study_description': str(getattr(ds, 'StudyDescription', '')),
+        'series_uid': str(getattr(ds, 'SeriesInstanceUID', '')),
+        'series_number': _optional_int(getattr(ds, 'SeriesNumber', None)),
+        'series_description': str(getattr(ds, 'SeriesDescription', '')),
+        'modality': str(getattr(ds, 'Modality', '')),
+        'sop_uid': str(getattr(ds, 'SOPInstanceUID', '')),
+        'instance_number': _optional_int(getattr(ds, 'InstanceNumber', None)),
+        'location': get_slice_location(ds),
+        'rows': int(ds.Rows),
+        'cols': int(ds.Columns),
+        'slope': float(getattr(ds, 'RescaleSlope', 1.0)),
+        'intercept': float(getattr(ds, 'RescaleIntercept', 0.0)),
+        'bits_allocated': int(getattr(ds, 'BitsAllocated', 16)),
+        'pixel_representation': int(getattr(ds, 'PixelRepresentation', 0)),
+        'pixel_spacing': '\\'.join(str(v) for v in _to_float_list(getattr(ds, 'PixelSpacing', None), [1.0, 1.0])),
+        'slice_thickness': float(getattr(ds, 'SliceThickness', 1.0) or 1.0),
+        'orientation': ('\\'.join(str(round(float(v), 4)) for v in orientation)
+                        if orientation is not None else None),
+        'transfer_syntax_uid': str(transfer_syntax) if transfer_syntax is not None else '',
+        'pixel_data_offset': pixel_data_offset,
+    }
+
+
+class SeriesIndex:
+    """
+    ディレクトリツリー内のDICOMファイルのヘッダを記録する SQLite の索引。
+
+    scan はヘッダだけを読み込み、前回から更新時刻・サイズが変わったファイルだけを読み直す
+    (差分更新)。search でシリーズ単位の一覧を、series_headers で1シリーズ分の
+    SliceHeader を返すため、シリーズを開くときにはそのシリーズのファイルだけを読めばよい。
+    接続は操作ごとに開くため、スキャン用のスレッドと GUI スレッドから同時に使ってよい。
+    """
+
+    def __init__(self, db_path: str = DEFAULT_INDEX_PATH):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        with closing(self._connect()) as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def scan(self, root: str, workers: int | None = None,
+             progress: Callable[[int, int], None] | None = None) -> Dict[str, int]:
+        """
+        root 以下の .dcm ファイルを索引に反映する。
+
+        Args:
+            root (str): 走査するディレクトリ。
+            workers (int | None): ヘッダ読み込みのワーカー数。None の場合は CPU コア数。
+            progress (Callable[[int, int], None] | None): (読み込み済み, 読み込み対象) を
+                受け取るコールバック。
+
+        Returns:
+            Dict[str, int]: added / updated / removed / unchanged の件数。
+        """
+        root = os.path.abspath(root)
+        found = {}
+        for dirpath, _, filenames in os.walk(root):
+            for name in filenames:
+                if name.lower().endswith('.dcm'):
+                    path = os.path.join(dirpath, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    found[path] = (st.st_mtime_ns, st.st_size)
+
+        prefix = os.path.join(root, '')
+        with closing(self._connect()) as conn:
+            known = {row['path']: (row['mtime_ns'], row['size']) for row in conn.execute(
+                "SELECT path, mtime_ns, size FROM instances WHERE substr(path, 1, ?) = ?",
+                (len(prefix), prefix))}
+
+        changed = [path for path, sig in found.items() if known.get(path) != sig]
+        removed = [path for path in known if path not in found]
+
+        records = []
+        if changed:
+            n_workers = resolve_workers(workers, len(changed))
+            with ThreadPoolExecutor(max_workers=n_workers) as pool:
+                for i, record in enumerate(pool.map(read_index_record, changed), start=1):
+                    if record is not None:
+                        records.append(record)
+                    if progress is not None:
+                        progress(i, len(changed))
+
+        with closing(self._connect()) as conn, conn:
+            conn.executemany("DELETE FROM instances WHERE path = ?", [(p,) for p in removed])
+            # 画像を持たなくなったファイルの古い行も消す
+            conn.executemany("DELETE FROM instances WHERE path = ?", [(p,) for p in changed])
+            conn.executemany(
+                f"INSERT INTO instances ({', '.join(_COLUMNS)}) VALUES ({', '.join('?' * len(_COLUMNS))})",
+                [tuple(r[c] for c in _COLUMNS) for r in records])
+
+        return {
+            'added': sum(1 for p in changed if p not in known),
+            'updated': sum(1 for p in changed if p in known),
+            'removed': len(removed),
+            'unchanged': len(found) - len(changed),
+        }
+
+    def search(self, text: str = '', limit: int = 1000) -> List[Dict]:
+        """
+        患者名・患者ID・検査/シリーズの説明・モダリティの部分一致でシリーズを検索する。
+
+        read_series.group_series と同じく、SeriesInstanceUID・画像の向き・画像サイズが
+        同じスライスを1件とする (同じシリーズ内の位置決め画像などは別の件になる)。
+
+        Returns:
+            List[Dict]: グループごとの辞書 (series_uid, patient_name, patient_id, study_date,
+                study_description, series_number, series_description, modality, rows, cols,
+                orientation, n_files)。検査日の新しい順。
+        """
+        pattern = f"%{text}%"
+        with closing(self._connect()) as conn:
+            rows = conn.execute(
+                """
+                SELECT series_uid, patient_name, patient_id, study_date, study_description,
+                       series_number, series_description, modality,
+                       rows, cols, orientation, COUNT(*) AS n_files
+                FROM instances
+                WHERE patient_name LIKE :p OR patient_id LIKE :p OR study_description LIKE :p
+                      OR series_description LIKE :p OR modality LIKE :p
+                GROUP BY series_uid, orientation, rows, cols
+                ORDER BY study_date DESC, patient_id, series_number, n_files DESC
+                LIMIT :limit
+                """, {'p': pattern, 'limit': limit}).fetchall()
+        return [dict(row, orientation=_parse_orientation(row['orientation'])) for row in rows]
+
+    def series_files(self, series_uid: str) -> List[str]:
+        with closing(self._connect()) as conn:
+            return [row['path'] for row in conn.execute(
+                "SELECT path FROM instances WHERE series_uid = ? ORDER BY location", (series_uid,))]
+
+    def series_headers(self, series_uid: str) -> List[SliceHeader]:
+        """
+        シリーズの全スライスの SliceHeader を索引から作る (ファイルは読まない)。
+        """
+        with closing(self._connect()) as conn:
+            rows = conn.execute("SELECT * FROM instances WHERE series_uid = ?", (series_uid,)).fetchall()
+        return [SliceHeader(
+            filepath=row['path'],
+            series_uid=row['series_uid'],
+            location=row['location'],
+            rows=row['rows'],
+            cols=row['cols'],
+            slope=row['slope'],
+            intercept=row['intercept'],
+            bits_allocated=row['bits_allocated'],
+            pixel_representation=row['pixel_representation'],
+            pixel_spacing=[float(v) for v in row['pixel_spacing'].split('\\')],
+            slice_thickness=row['slice_thickness'],
+            orientation=_parse_orientation(row['orientation']),
+            transfer_syntax_uid=row['transfer_syntax_uid'],
+            series_number=row['series_number'],
+            series_description=row['series_description'],
+            modality=row['modality'],
+        ) for row in rows]
+
+    def clear(self) -> None:
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM instances")
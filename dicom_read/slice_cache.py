@@ -0,0 +1,191 @@
+# dicom_read/slice_cache.py
+
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List
+
+import numpy as np
+import pydicom
+
+DEFAULT_MAX_BYTES = 512 * 1024 ** 2  # 512 MB
+DEFAULT_PREFETCH = 4
+
+
+@dataclass
+class CachedSlice:
+    """
+    デコード済みのスライス (HU値とヘッダー)。
+    ds は PixelData を取り除いた Dataset で、ヘッダー表示などに使う。
+    """
+    hu: np.ndarray
+    ds: pydicom.Dataset
+
+    @property
+    def nbytes(self) -> int:
+        return self.hu.nbytes
+
+
+def decode_hu_slice(filepath: str) -> CachedSlice:
+    """
+    DICOMファイルを読み込み、HU値とヘッダーを返す (HU値の計算は従来の load_image と同じ)。
+
+    Args:
+        filepath (str): DICOMファイルのパス。
+
+    Returns:
+        CachedSlice: HU値と、PixelData を取り除いたヘッダー。
+    """
+    ds = pydicom.dcmread(filepath)
+    # pydicom の pixel_array は Big Endian でもバイトオーダー付きの dtype (>i2 など) で
+    # 正しい値を返すため、バイトスワップは不要 (代入・型変換でネイティブになる)
+    pixel_array = ds.pixel_array.astype(np.float32)
+    slope = getattr(ds, 'RescaleSlope', 1.0)
+    intercept = getattr(ds, 'RescaleIntercept', 0.0)
+    hu = pixel_array * slope + intercept
+
+    # 圧縮前のピクセルデータ (とデコード結果のキャッシュ) はキャッシュに残さない
+    del ds.PixelData
+    return CachedSlice(hu, ds)
+
+
+class SliceCache:
+    """
+    デコード済みスライスのLRUキャッシュと、移動方向の先読み。
+
+    キャッシュはHU配列の合計バイト数が max_bytes を超えないよう、最後に使われた時刻の
+    古いスライスから削除する。prefetch は表示中のスライスから移動方向に prefetch_count 枚を
+    バックグラウンドでデコードする。方向が分からない場合 (0) は前後両方を先読みする。
+    get / prefetch は GUI スレッドから呼ぶ想定で、キャッシュ自体はロックで保護する。
+    """
+
+    def __init__(self, files: List[str], max_bytes: int = DEFAULT_MAX_BYTES,
+                 prefetch_count: int = DEFAULT_PREFETCH, workers: int = 2):
+        self.files = files
+        self.max_bytes = max_bytes
+        self.prefetch_count = prefetch_count
+        self._entries: "OrderedDict[int, CachedSlice]" = OrderedDict()
+        self._nbytes = 0
+        self._pending: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='slice-prefetch')
+
+        # 計測用カウンタ (先読み枚数の調整に使う)
+        self.hits = 0
+        self.misses = 0
+        self.prefetched = 0
+        self.evictions = 0
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hit_rate,
+            'prefetched': self.prefetched,
+            'evictions': self.evictions,
+            'cached_slices': len(self._entries),
+            'cached_bytes': self._nbytes,
+        }
+
+    def get(self, index: int) -> CachedSlice:
+        """
+        スライスを返す。キャッシュに無い場合はこのスレッドでデコードする。
+        先読み中のスライスはデコードの完了を待ち、ヒットとして数える。
+        """
+        with self._lock:
+            entry = self._entries.get(index)
+            if entry is not None:
+                self._entries.move_to_end(index)
+                self.hits += 1
+                return entry
+            future = self._pending.get(index)
+
+        if future is not None:
+            try:
+                entry = future.result()
+            except CancelledError:
+                # 待っている間に先読み範囲から外れて取り消された場合は、このスレッドでデコードする
+                entry = None
+            if entry is not None:
+                with self._lock:
+                    self.hits += 1
+                return entry
+
+        with self._lock:
+            self.misses += 1
+        entry = decode_hu_slice(self.files[index])
+        self._insert(index, entry)
+        return entry
+
+    def prefetch(self, index: int, direction: int = 0) -> None:
+        """
+        index の前後 (direction > 0 なら後ろ、< 0 なら前、0 なら両方) を先読みする。
+        先読み範囲から外れた未着手のデコードは取り消す。
+        """
+        n = len(self.files)
+        if direction > 0:
+            targets = range(index + 1, index + 1 + self.prefetch_count)
+        elif direction < 0:
+            targets = range(index - 1, index - 1 - self.prefetch_count, -1)
+        else:
+            targets = [i for k in range(1, self.prefetch_count + 1) for i in (index + k, index - k)]
+        targets = [i for i in targets if 0 <= i < n]
+
+        with self._lock:
+            wanted = set(targets)
+            for i, future in list(self._pending.items()):
+                if i not in wanted and future.cancel():
+                    del self._pending[i]
+            for i in targets:
+                if i in self._entries or i in self._pending:
+                    continue
+                self._pending[i] = self._executor.submit(self._prefetch_one, i)
+
+    def _prefetch_one(self, index: int) -> CachedSlice | None:
+        try:
+            entry = decode_hu_slice(self.files[index])
+        except Exception as e:
+            print(f"先読みエラー ({self.files[index]}): {e}")
+            entry = None
+        if entry is not None:
+            with self._lock:
+                self.prefetched += 1
+            self._insert(index, entry)
+        with self._lock:
+            self._pending.pop(index, None)
+        return entry
+
+    def _insert(self, index: int, entry: CachedSlice) -> None:
+        with self._lock:
+            old = self._entries.pop(index, None)
+            if old is not None:
+                self._nbytes -= old.nbytes
+            self._entries[index] = entry
+            self._nbytes += entry.nbytes
+            # 上限を超えた分を古い順に削除する (入れたばかりのスライスは残す)
+            while self._nbytes > self.max_bytes and len(self._entries) > 1:
+                _, evicted = self._entries.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            for future in self._pending.values():
+                future.cancel()
+            self._pending.clear()
+            self._entries.clear()
+            self._nbytes = 0
+
+    def shutdown(self) -> None:
+        self.clear()
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,198 @@
+# dicom_read/volume_cache.py
+
+import hashlib
+import json
+import os
+import shutil
+import time
+from typing import List, Tuple
+
+import numpy as np
+import pydicom
+
+from dicom_read.read_series import SeriesVolume
+from dicom_read.volume_stats import VolumeStatistics
+from dicom_perf.trace import tracer
+
+CACHE_VERSION = 3
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".ctmr_viewer_cache", "volumes")
+DEFAULT_MAX_BYTES = 8 * 1024 ** 3  # 8 GB
+
+VOLUME_FILE = 'volume.npy'
+STATS_FILE = 'stats.npz'
+META_FILE = 'meta.json'
+
+
+def folder_signature(filepaths: List[str]) -> str:
+    """
+    ファイル一覧・更新時刻・サイズからキャッシュキーを作る。
+    いずれかのファイルが追加・削除・更新されるとキーが変わる。
+    """
+    digest = hashlib.sha1()
+    for filepath in sorted(os.path.abspath(f) for f in filepaths):
+        st = os.stat(filepath)
+        digest.update(f"{filepath}|{st.st_mtime_ns}|{st.st_size}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class VolumeCache:
+    """
+    ソート済みボリュームをディスクに保存し、再オープン時にメモリマップで読み込むキャッシュ。
+
+    エントリは「フォルダ署名_シリーズUIDのハッシュ」という名前のディレクトリで、
+    生ピクセル値の volume.npy、統計情報の stats.npz、Rescale値やファイル一覧を持つ
+    meta.json からなる。
+    合計サイズが上限を超えた場合は、最後に使われた時刻の古いエントリから削除する (LRU)。
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+
+    def _entry_name(self, signature: str, series_uid: str) -> str:
+        uid_hash = hashlib.sha1(series_uid.encode('utf-8')).hexdigest()[:12]
+        return f"{signature}_{uid_hash}"
+
+    def _entries(self) -> List[Tuple[str, dict]]:
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            meta_path = os.path.join(self.cache_dir, name, META_FILE)
+            try:
+                with open(meta_path, encoding='utf-8') as f:
+                    meta = json.load(f)
+            except (OSError, ValueError):
+                continue
+            entries.append((os.path.join(self.cache_dir, name), meta))
+        return entries
+
+    def load(self, filepaths: List[str], series_uid: str | None = None) -> SeriesVolume | None:
+        """
+        キャッシュ済みのボリュームをメモリマップで開く。
+
+        Args:
+            filepaths (List[str]): フォルダ内のDICOMファイル一覧 (キャッシュキーの計算に使う)。
+            series_uid (str | None): シリーズUID。None の場合は、このフォルダで最後に
+                使われたシリーズを返す。
+
+        Returns:
+            SeriesVolume | None: キャッシュが無い、またはファイルが変更されている場合は None。
+        """
+        signature = folder_signature(filepaths)
+        if series_uid is not None:
+            candidates = [os.path.join(self.cache_dir, self._entry_name(signature, series_uid))]
+        else:
+            matched = [(meta.get('last_access', 0), path) for path, meta in self._entries()
+                       if meta.get('signature') == signature]
+            candidates = [path for _, path in sorted(matched, reverse=True)]
+
+        for entry_dir in candidates:
+            volume = self._open_entry(entry_dir)
+            if volume is not None:
+                tracer.count('volume_cache_hit')
+                return volume
+        tracer.count('volume_cache_miss')
+        return None
+
+    def _open_entry(self, entry_dir: str) -> SeriesVolume | None:
+        if not os.path.isfile(os.path.join(entry_dir, META_FILE)):
+            return None
+        try:
+            with open(os.path.join(entry_dir, META_FILE), encoding='utf-8') as f:
+                meta = json.load(f)
+            if meta.get('version') != CACHE_VERSION:
+                return None
+            raw = np.load(os.path.join(entry_dir, VOLUME_FILE), mmap_mode='r')
+            stats = VolumeStatistics.load(os.path.join(entry_dir, STATS_FILE))
+            header = pydicom.dcmread(meta['files'][0], stop_before_pixels=True)
+        except (OSError, ValueError, KeyError, IndexError) as e:
+            print(f"ボリュームキャッシュ読み込みエラー: {e}")
+            return None
+
+        meta['last_access'] = time.time()
+        self._write_meta(entry_dir, meta)
+
+        return SeriesVolume(raw,
+                            np.array(meta['slopes'], dtype=np.float32),
+                            np.array(meta['intercepts'], dtype=np.float32),
+                            meta['files'], header, series_uid=meta['series_uid'], stats=stats)
+
+    def store(self, volume: SeriesVolume, filepaths: List[str]) -> str | None:
+        """
+        ボリュームをキャッシュに保存し、サイズ上限を超えた分を削除する。
+
+        Args:
+            volume (SeriesVolume): 保存するボリューム。
+            filepaths (List[str]): フォルダ内のDICOMファイル一覧 (キャッシュキーの計算に使う)。
+
+        Returns:
+            str | None: 保存したエントリのディレクトリ。上限より大きい場合などは None。
+        """
+        if volume.nbytes > self.max_bytes:
+            return None
+
+        signature = folder_signature(filepaths)
+        entry_dir = os.path.join(self.cache_dir, self._entry_name(signature, volume.series_uid))
+        tmp_dir = f"{entry_dir}.tmp{os.getpid()}"
+        meta = {
+            'version': CACHE_VERSION,
+            'signature': signature,
+            'series_uid': volume.series_uid,
+            'files': list(volume.files),
+            'slopes': [float(v) for v in volume.slopes],
+            'intercepts': [float(v) for v in volume.intercepts],
+            'shape': list(volume.shape),
+            'dtype': str(volume.raw.dtype),
+            'nbytes': int(volume.nbytes),
+            'last_access': time.time(),
+        }
+
+        try:
+            # 書き込み途中のエントリが読まれないよう、一時ディレクトリに書いてから置き換える
+            os.makedirs(tmp_dir, exist_ok=True)
+            np.save(os.path.join(tmp_dir, VOLUME_FILE), np.ascontiguousarray(volume.raw))
+            volume.stats.save(os.path.join(tmp_dir, STATS_FILE))
+            self._write_meta(tmp_dir, meta)
+            if os.path.isdir(entry_dir):
+                shutil.rmtree(entry_dir, ignore_errors=True)
+            os.replace(tmp_dir, entry_dir)
+        except OSError as e:
+            print(f"ボリュームキャッシュ保存エラー: {e}")
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            return None
+
+        self.evict(keep=entry_dir)
+        return entry_dir
+
+    def _write_meta(self, entry_dir: str, meta: dict) -> None:
+        try:
+            with open(os.path.join(entry_dir, META_FILE), 'w', encoding='utf-8') as f:
+                json.dump(meta, f)
+        except OSError as e:
+            print(f"ボリュームキャッシュ保存エラー: {e}")
+
+    def total_bytes(self) -> int:
+        return sum(int(meta.get('nbytes', 0)) for _, meta in self._entries())
+
+    def evict(self, keep: str | None = None) -> None:
+        """
+        合計サイズが max_bytes 以下になるまで、最後に使われた時刻が古い順に削除する。
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1].get('last_access', 0))
+        total = sum(int(meta.get('nbytes', 0)) for _, meta in entries)
+        for entry_dir, meta in entries:
+            if total <= self.max_bytes:
+                break
+            if entry_dir == keep:
+                continue
+            try:
+                shutil.rmtree(entry_dir)
+            except OSError:
+                # 他のウィンドウでメモリマップ中の場合などは次回に回す
+                continue
+            total -= int(meta.get('nbytes', 0))
+
+    def clear(self) -> None:
+        for entry_dir, _ in self._entries():
+            shutil.rmtree(entry_dir, ignore_errors=True)
@@ -0,0 +1,181 @@
+# dicom_read/volume_stats.py
+
+import threading
+from typing import Dict, Tuple
+
+import numpy as np
+
+# HUヒストグラムの範囲 (1HU 幅のビン)。範囲外の値は両端のビンに入れる
+HIST_MIN = -32768
+HIST_MAX = 65535
+N_BINS = HIST_MAX - HIST_MIN + 1
+
+# 生ピクセル値の出現回数を bincount で数えられる型と、添字として見る型
+_COUNTABLE_DTYPES = {
+    np.dtype(np.int16): np.dtype(np.uint16),
+    np.dtype(np.uint16): np.dtype(np.uint16),
+    np.dtype(np.int8): np.dtype(np.uint8),
+    np.dtype(np.uint8): np.dtype(np.uint8),
+}
+
+
+def _hu_to_bin(hu: np.ndarray) -> np.ndarray:
+    return np.clip(np.floor(hu), HIST_MIN, HIST_MAX).astype(np.int64) - HIST_MIN
+
+
+def hu_value_counts(raw: np.ndarray, slope=1.0, intercept=0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生ピクセル値の配列に含まれるHU値 (float32) と、その出現回数を返す。
+
+    16bit/8bit の場合は、生ピクセル値の出現回数を bincount で数えてから出現した値だけを
+    HUに変換するため、画素ごとの float 変換やソートは行わない。HU は表示と同じ float32
+    の演算で求める。
+    """
+    index_dtype = _COUNTABLE_DTYPES.get(raw.dtype)
+    if index_dtype is not None and np.ndim(slope) == 0 and np.ndim(intercept) == 0:
+        raw_counts = np.bincount(raw.view(index_dtype).ravel(), minlength=2 ** (8 * index_dtype.itemsize))
+        present = np.flatnonzero(raw_counts)
+        values = present.astype(index_dtype).view(raw.dtype)
+        hu = values.astype(np.float32) * np.float32(slope) + np.float32(intercept)
+        return hu, raw_counts[present]
+
+    hu = raw.astype(np.float32) * slope + intercept
+    return np.unique(hu, return_counts=True)
+
+
+def hu_histogram_entries(raw: np.ndarray, slope=1.0, intercept=0.0) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    生ピクセル値の配列について、HUヒストグラムの (ビン番号, 度数) の組を返す。
+    HU は1HU 幅のビンに切り捨てる。
+    """
+    hu, counts = hu_value_counts(raw, slope, intercept)
+    return _hu_to_bin(hu), counts
+
+
+def hu_histogram(raw: np.ndarray, slope=1.0, intercept=0.0) -> np.ndarray:
+    """
+    生ピクセル値の配列 (スライスや断面) のHUヒストグラム (N_BINS 要素) を返す。
+    """
+    hist = np.zeros(N_BINS, dtype=np.int64)
+    bins, counts = hu_histogram_entries(raw, slope, intercept)
+    np.add.at(hist, bins, counts)
+    return hist
+
+
+def histogram_percentile(hist: np.ndarray, q) -> np.ndarray:
+    """
+    ヒストグラムの累積和からパーセンタイルを求める (O(ビン数))。
+
+    np.percentile と同じく順序統計量の間を線形補間する。HU が整数の場合
+    (Slope=1 など) は np.percentile と同じ値になる。
+    """
+    q = np.asarray(q, dtype=np.float64)
+    cumsum = np.cumsum(hist)
+    n = int(cumsum[-1])
+    if n == 0:
+        return np.full(q.shape, np.nan)
+
+    pos = q / 100 * (n - 1)
+    lo = np.floor(pos).astype(np.int64)
+    hi = np.minimum(lo + 1, n - 1)
+    v_lo = np.searchsorted(cumsum, lo, side='right') + HIST_MIN
+    v_hi = np.searchsorted(cumsum, hi, side='right') + HIST_MIN
+    return v_lo + (pos - lo) * (v_hi - v_lo)
+
+
+class VolumeStatistics:
+    """
+    シリーズ読み込み中にスライスごとに集計する統計情報。
+
+    スライスごとの最小・最大・平均・標準偏差・画素数と、ボリューム全体のHUヒストグラムを
+    保持する。ボリューム全体の値はスライスごとの集計から O(スライス数) で、パーセンタイルは
+    ヒストグラムから O(ビン数) で求めるため、ボクセルデータに再び触れる必要がない。
+    add_slice は複数のワーカーから同時に呼んでよい。
+    """
+
+    def __init__(self, n_slices: int = 0):
+        self.histogram = np.zeros(N_BINS, dtype=np.int64)
+        # 未集計のスライスは NaN / 0
+        self.slice_min = np.full(n_slices, np.nan)
+        self.slice_max = np.full(n_slices, np.nan)
+        self.slice_mean = np.full(n_slices, np.nan)
+        self.slice_std = np.full(n_slices, np.nan)
+        self.slice_count = np.zeros(n_slices, dtype=np.int64)
+        self._lock = threading.Lock()
+
+    @property
+    def count(self) -> int:
+        return int(self.slice_count.sum())
+
+    def add_slice(self, z: int, raw_slice: np.ndarray, slope: float, intercept: float) -> None:
+        # 集計はロックの外で行い、ヒストグラムへの加算だけを排他にする
+        hu, counts = hu_value_counts(raw_slice, slope, intercept)
+        hu = hu.astype(np.float64)
+        n = int(counts.sum())
+        mean = float((hu * counts).sum() / n)
+
+        self.slice_min[z] = hu.min()
+        self.slice_max[z] = hu.max()
+        self.slice_mean[z] = mean
+        self.slice_std[z] = np.sqrt((counts * (hu - mean) ** 2).sum() / n)
+        self.slice_count[z] = n
+
+        bins = _hu_to_bin(hu)
+        with self._lock:
+            np.add.at(self.histogram, bins, counts)
+
+    def slice_summary(self, z: int) -> Dict[str, float]:
+        """
+        スライス z の統計 (min, max, mean, std, count) を返す。
+        """
+        return {
+            'min': float(self.slice_min[z]),
+            'max': float(self.slice_max[z]),
+            'mean': float(self.slice_mean[z]),
+            'std': float(self.slice_std[z]),
+            'count': int(self.slice_count[z]),
+        }
+
+    def volume_summary(self) -> Dict[str, float]:
+        """
+        集計済みの全スライスをまとめた統計 (min, max, mean, std, count) を返す。
+        スライスごとの値から求めるため O(スライス数)。
+        """
+        done = self.slice_count > 0
+        counts = self.slice_count[done]
+        n = int(counts.sum())
+        if n == 0:
+            return {'min': np.nan, 'max': np.nan, 'mean': np.nan, 'std': np.nan, 'count': 0}
+
+        means = self.slice_mean[done]
+        mean = float((means * counts).sum() / n)
+        # スライスごとの分散と平均のずれから全体の分散を求める
+        variance = (counts * (self.slice_std[done] ** 2 + (means - mean) ** 2)).sum() / n
+        return {
+            'min': float(self.slice_min[done].min()),
+            'max': float(self.slice_max[done].max()),
+            'mean': mean,
+            'std': float(np.sqrt(variance)),
+            'count': n,
+        }
+
+    def percentile(self, q) -> np.ndarray:
+        return histogram_percentile(self.histogram, q)
+
+    def save(self, path: str) -> None:
+        np.savez(path, histogram=self.histogram,
+                 slice_min=self.slice_min, slice_max=self.slice_max,
+                 slice_mean=self.slice_mean, slice_std=self.slice_std,
+                 slice_count=self.slice_count)
+
+    @classmethod
+    def load(cls, path: str) -> 'VolumeStatistics':
+        stats = cls()
+        with np.load(path) as data:
+            stats.histogram = data['histogram'].astype(np.int64)
+            stats.slice_min = data['slice_min']
+            stats.slice_max = data['slice_max']
+            stats.slice_mean = data['slice_mean']
+            stats.slice_std = data['slice_std']
+            stats.slice_count = data['slice_count'].astype(np.int64)
+        return stats
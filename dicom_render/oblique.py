@@ -0,0 +1,299 @@
+# dicom_render/oblique.py
+
+import math
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, Tuple
+
+import numpy as np
+
+from dicom_read.read_series import SeriesVolume
+from dicom_render.window_lut import apply_window
+
+DEFAULT_OBLIQUE_WORKERS = min(8, os.cpu_count() or 1)
+DEFAULT_MAX_SIZE = 1024        # 斜断面画像の一辺の上限 (これを超える場合はサンプル間隔を広げる)
+DEFAULT_CHUNK_SAMPLES = 65536  # ワーカー1回分のサンプル数
+
+
+@dataclass(frozen=True)
+class ObliquePlane:
+    """
+    ボリュームの任意の点を通る斜断面。
+
+    azimuth (度) は Axial 面内での断面の向きで、0 で Coronal (横軸が x)、90 で Sagittal
+    (横軸が y) と同じ向きになる。tilt (度) は縦軸を z 軸から傾ける角度で、0 の場合は
+    z 軸を含む (Axial 面に垂直な) 断面になる。center は (z, y, x) のボクセル座標。
+    """
+    center: Tuple[float, float, float]
+    azimuth: float = 0.0
+    tilt: float = 0.0
+
+    def axes(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        断面の横軸 u と縦軸 w の単位ベクトル (物理座標、(z, y, x) の順)。w は頭側 (+z) を向く。
+        """
+        a, t = math.radians(self.azimuth), math.radians(self.tilt)
+        u = np.array([0.0, math.sin(a), math.cos(a)])
+        w = np.array([math.cos(t), math.sin(t) * math.cos(a), -math.sin(t) * math.sin(a)])
+        return u, w
+
+
+@dataclass
+class SamplingGrid:
+    """
+    斜断面の各画素の、ボリューム内での補間位置 (平坦化したインデックスと重み)。
+    W/L を変えても作り直す必要はなく、断面の位置・向きが変わったときだけ作り直す。
+    """
+    shape: Tuple[int, int]
+    base: np.ndarray      # (z0, y0, x0) の平坦化インデックス (int64)
+    z0: np.ndarray        # 下側・上側のスライス番号 (Rescale 値の参照用, int32)
+    z1: np.ndarray
+    fz: np.ndarray        # 各軸の補間の重み (float32)
+    fy: np.ndarray
+    fx: np.ndarray
+    valid: np.ndarray     # ボリューム内の画素 (bool)
+    offsets: Tuple[int, int, int]  # z, y, x 方向に1つ隣の要素までの距離
+    step_mm: float
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.base, self.z0, self.z1, self.fz, self.fy, self.fx, self.valid))
+
+
+def build_sampling_grid(shape: Tuple[int, int, int], spacing: Tuple[float, float, float],
+                        plane: ObliquePlane, max_size: int = DEFAULT_MAX_SIZE,
+                        pool: ThreadPoolExecutor | None = None,
+                        chunk_samples: int = DEFAULT_CHUNK_SAMPLES) -> SamplingGrid:
+    """
+    斜断面がボリュームと交わる範囲を覆う、等方 (縦横同じ間隔) のサンプリング格子を作る。
+
+    Args:
+        shape (Tuple[int, int, int]): ボリュームの (z, y, x)。
+        spacing (Tuple[float, float, float]): (スライス間隔, 行間隔, 列間隔) の mm。
+        plane (ObliquePlane): 断面。
+        max_size (int): 画像の一辺の上限。
+        pool (ThreadPoolExecutor | None): 行を分けて並列に計算するスレッドプール。
+        chunk_samples (int): pool に渡す1回分のおおよその画素数。
+
+    Returns:
+        SamplingGrid: 画像の上が頭側になる格子。
+    """
+    spacing = np.asarray(spacing, dtype=np.float64)
+    dims = np.asarray(shape)
+    u, w = plane.axes()
+    center = np.asarray(plane.center, dtype=np.float64) * spacing
+
+    # ボリュームの8つの頂点を断面の軸へ投影し、画像の範囲を決める
+    corners = np.array([[cz, cy, cx] for cz in (0, dims[0] - 1) for cy in (0, dims[1] - 1)
+                        for cx in (0, dims[2] - 1)], dtype=np.float64) * spacing - center
+    u_proj, w_proj = corners @ u, corners @ w
+    step = float(min(spacing[1], spacing[2]))
+    extent = max(u_proj.max() - u_proj.min(), w_proj.max() - w_proj.min())
+    if extent / step + 1 > max_size:
+        step = extent / (max_size - 1)
+    n_u = int(math.floor((u_proj.max() - u_proj.min()) / step)) + 1
+    n_w = int(math.floor((w_proj.max() - w_proj.min()) / step)) + 1
+
+    rows = (w_proj.max() - np.arange(n_w) * step).astype(np.float32)
+    cols = (u_proj.min() + np.arange(n_u) * step).astype(np.float32)
+    n = n_w * n_u
+    grid = SamplingGrid(
+        shape=(n_w, n_u),
+        base=np.empty(n, dtype=np.int64),
+        z0=np.empty(n, dtype=np.int32),
+        z1=np.empty(n, dtype=np.int32),
+        fz=np.empty(n, dtype=np.float32),
+        fy=np.empty(n, dtype=np.float32),
+        fx=np.empty(n, dtype=np.float32),
+        valid=np.empty(n, dtype=bool),
+        offsets=tuple(int(np.prod(dims[axis + 1:])) if dims[axis] > 1 else 0 for axis in range(3)),
+        step_mm=step,
+    )
+    # 各軸のボクセル座標は「行方向の増分 + 列方向の増分」の外和になるため、軸ごとに float32 で計算する
+    origin = (center / spacing).astype(np.float32)
+    row_step = (w / spacing).astype(np.float32)
+    col_step = (u / spacing).astype(np.float32)
+
+    def fill_rows(r0: int, r1: int) -> None:
+        part = slice(r0 * n_u, r1 * n_u)
+        base = grid.base[part]
+        base[:] = 0
+        valid = grid.valid[part]
+        valid[:] = True
+        for axis, frac in enumerate((grid.fz, grid.fy, grid.fx)):
+            coord = (origin[axis] + rows[r0:r1, None] * row_step[axis]
+                     + cols[None, :] * col_step[axis]).reshape(-1)
+            last = dims[axis] - 1
+            valid &= (coord >= -1e-3) & (coord <= last + 1e-3)
+            np.clip(coord, 0, last, out=coord)
+            # 下側の格子点は最後の1つ手前までとし、上側 (+1) が範囲外にならないようにする
+            lower = np.minimum(np.floor(coord), max(last - 1, 0)).astype(np.int32)
+            np.subtract(coord, lower, out=frac[part])
+            base += lower.astype(np.int64) * int(np.prod(dims[axis + 1:]))
+            if axis == 0:
+                grid.z0[part] = lower
+                np.minimum(lower + 1, last, out=grid.z1[part])
+
+    if pool is None:
+        fill_rows(0, n_w)
+    else:
+        chunk_rows = max(1, chunk_samples // max(n_u, 1))
+        for future in [pool.submit(fill_rows, r0, min(r0 + chunk_rows, n_w)) for r0 in range(0, n_w, chunk_rows)]:
+            future.result()
+    return grid
+
+
+class ObliqueResampler:
+    """
+    ボリュームから斜断面を三線形補間で切り出し、W/L 適用済みの画像にする。
+
+    サンプリング格子と補間後のHU値は断面 (位置・向き) ごとに1つだけ保持し、W/L だけが
+    変わった場合は保持しているHU値に W/L を適用し直すだけで済む。補間は格子を
+    chunk_samples ずつに分けてスレッドプールで並列に行う (NumPy が GIL を解放する)。
+    スライスごとに Rescale 値が異なる場合も、上下のスライスでそれぞれHU値に変換してから
+    z 方向に補間するため正しい値になる。同時に呼ぶのは1スレッドまでとする。
+    pool を渡した場合はそのスレッドプールを使い、shutdown でも止めない (ボリュームが
+    替わるたびに作り直す場合などに、プールを共有する)。
+    """
+
+    def __init__(self, volume: SeriesVolume, spacing: Tuple[float, float, float],
+                 workers: int = DEFAULT_OBLIQUE_WORKERS, max_size: int = DEFAULT_MAX_SIZE,
+                 chunk_samples: int = DEFAULT_CHUNK_SAMPLES, pool: ThreadPoolExecutor | None = None):
+        self.volume = volume
+        self.spacing = tuple(float(s) for s in spacing)
+        self.max_size = max_size
+        self.chunk_samples = chunk_samples
+        self._owns_pool = pool is None
+        self._pool = pool or ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix='oblique')
+        self._grid_key = None
+        self._grid = None
+        self._hu_key = None
+        self._hu = None
+
+        # 計測用カウンタ
+        self.grid_builds = 0
+        self.resamples = 0
+
+    def sampling_grid(self, plane: ObliquePlane) -> SamplingGrid:
+        if self._grid_key != plane:
+            self._grid = build_sampling_grid(self.volume.shape, self.spacing, plane, self.max_size,
+                                             pool=self._pool, chunk_samples=self.chunk_samples)
+            self._grid_key = plane
+            self.grid_builds += 1
+        return self._grid
+
+    def resample(self, plane: ObliquePlane) -> np.ndarray:
+        """
+        斜断面のHU値 (float32, 画像の形) を返す。ボリューム外の画素の値は不定 (valid を参照)。
+        同じ断面・同じ読み込み状態の間は保持している配列をそのまま返す。
+        """
+        key = (plane, self.volume.loaded_slices)
+        if self._hu_key == key:
+            return self._hu
+        grid = self.sampling_grid(plane)
+        n = grid.base.size
+        hu = np.empty(n, dtype=np.float32)
+        flat = self.volume.raw.reshape(-1)
+        chunks = range(0, n, self.chunk_samples)
+        for future in [self._pool.submit(self._resample_chunk, grid, flat, hu, start,
+                                         min(start + self.chunk_samples, n)) for start in chunks]:
+            future.result()
+        self._hu = hu.reshape(grid.shape)
+        self._hu_key = key
+        self.resamples += 1
+        return self._hu
+
+    def _resample_chunk(self, grid: SamplingGrid, flat: np.ndarray, out: np.ndarray, start: int, stop: int) -> None:
+        oz, oy, ox = grid.offsets
+        fy, fx = grid.fy[start:stop], grid.fx[start:stop]
+
+        def bilinear(index):
+            v00 = flat.take(index).astype(np.float32)
+            v01 = flat.take(index + ox).astype(np.float32)
+            v10 = flat.take(index + oy).astype(np.float32)
+            v11 = flat.take(index + oy + ox).astype(np.float32)
+            top = v00 + (v01 - v00) * fx
+            bottom = v10 + (v11 - v10) * fx
+            return top + (bottom - top) * fy
+
+        base = grid.base[start:stop]
+        lower = bilinear(base)
+        upper = bilinear(base + oz)
+        rescale = self.volume.uniform_rescale
+        if rescale is None:
+            z0, z1 = grid.z0[start:stop], grid.z1[start:stop]
+            slopes, intercepts = self.volume.slopes, self.volume.intercepts
+            lower = lower * slopes[z0] + intercepts[z0]
+            upper = upper * slopes[z1] + intercepts[z1]
+        value = lower + (upper - lower) * grid.fz[start:stop]
+        if rescale is not None:
+            # Rescale が一様なら、補間した生ピクセル値を最後にまとめてHU値へ変換する
+            value = value * np.float32(rescale[0]) + np.float32(rescale[1])
+        out[start:stop] = value
+
+    def render(self, plane: ObliquePlane, ww: float, wl: float, out: np.ndarray | None = None) -> np.ndarray:
+        """
+        斜断面に W/L を適用した uint8 画像を返す (ボリューム外は 0)。
+
+        Args:
+            plane (ObliquePlane): 断面。
+            ww (float), wl (float): ウィンドウ幅・ウィンドウレベル。
+            out (np.ndarray | None): 書き込み先。None の場合は新しい配列を返す。
+        """
+        hu = self.resample(plane)
+        if out is None:
+            out = np.empty(hu.shape, dtype=np.uint8)
+        apply_window(hu, ww, wl, out=out)
+        out.reshape(-1)[~self._grid.valid] = 0
+        return out
+
+    def clear(self) -> None:
+        self._grid_key = self._grid = None
+        self._hu_key = self._hu = None
+
+    def shutdown(self) -> None:
+        self.clear()
+        if self._owns_pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def benchmark_oblique(volume: SeriesVolume, spacing=(1.0, 1.0, 1.0), repeats: int = 20,
+                      workers: int = DEFAULT_OBLIQUE_WORKERS) -> Dict[str, float]:
+    """
+    斜断面の描画時間 (ms, 中央値) を、断面を動かす場合と W/L だけを変える場合で計る。
+    """
+    resampler = ObliqueResampler(volume, spacing, workers=workers)
+    center = tuple(n / 2 for n in volume.shape)
+    out = None
+
+    def measure(make_args):
+        nonlocal out
+        times = []
+        for i in range(repeats):
+            plane, ww = make_args(i)
+            start = time.perf_counter()
+            out = resampler.render(plane, ww, 40.0)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times) * 1000)
+
+    results = {
+        'move_ms': measure(lambda i: (ObliquePlane(center, azimuth=30.0 + i, tilt=10.0), 400.0)),
+        'window_ms': measure(lambda i: (ObliquePlane(center, azimuth=30.0, tilt=10.0), 400.0 + i)),
+        'image_shape': out.shape,
+    }
+    resampler.shutdown()
+    return results
+
+
+if __name__ == '__main__':
+    # 合成ボリューム (512^3) で斜断面の描画時間を計る
+    rng = np.random.default_rng(0)
+    n = 512
+    raw = rng.integers(-1024, 2000, size=(n, n, n), dtype=np.int16)
+    volume = SeriesVolume(raw, np.ones(n, dtype=np.float32), np.zeros(n, dtype=np.float32), [], None)
+    for workers in sorted({1, DEFAULT_OBLIQUE_WORKERS}):
+        result = benchmark_oblique(volume, workers=workers)
+        print(f"workers {workers}: 断面移動 {result['move_ms']:7.2f} ms | W/L のみ {result['window_ms']:7.2f} ms"
+              f" | 画像 {result['image_shape']}")
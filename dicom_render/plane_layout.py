@@ -0,0 +1,179 @@
+# dicom_render/plane_layout.py
+
+import threading
+import time
+from typing import Dict
+
+import numpy as np
+
+from dicom_read.read_series import SeriesVolume
+from dicom_render.window_lut import WindowLevelRenderer
+
+DEFAULT_LAYOUT_BUDGET = 2 * 1024 ** 3  # 2 GB (並べ替えたコピーの合計)
+
+# 断面ごとに、先頭の軸がその断面のインデックスになるよう並べ替える軸の順序。
+# z は plane_raw と同じく頭側が上になるよう反転してから並べ替える
+_PLANE_AXES = {
+    "Coronal": (1, 0, 2),   # (y, z, x)
+    "Sagittal": (2, 0, 1),  # (x, z, y)
+}
+
+
+class PlaneLayoutCache:
+    """
+    Coronal/Sagittal の断面を連続したメモリから切り出すための、並べ替え済みボリュームのキャッシュ。
+
+    ボリュームは (z, y, x) の C順で保持しているため、Coronal/Sagittal の断面はボリューム全体に
+    散らばった要素を集めることになり Axial より遅い。読み込みが完了したボリュームについて、
+    断面が初めて要求された時点で (y, z, x) / (x, z, y) 順のコピーをバックグラウンドで作り、
+    以降はそこから連続した断面を返す。コピーを作るのは、断面の各行が連続していない
+    (要素ごとにストライドを飛ぶ) 断面だけで、C順では通常 Sagittal が該当する。
+    Coronal は各行が x 方向に連続しているため、コピーしても速度はほとんど変わらない。
+    コピーが無い間、または memory_budget を超える場合は元のボリュームから切り出す。
+    返す断面は SeriesVolume.plane_raw と同じ向き・値になる。
+    """
+
+    def __init__(self, volume: SeriesVolume, memory_budget: int = DEFAULT_LAYOUT_BUDGET):
+        self.volume = volume
+        self.memory_budget = memory_budget
+        self._copies: Dict[str, np.ndarray] = {}
+        self._building = set()
+        self._lock = threading.Lock()
+        self._built = threading.Condition(self._lock)  # コピーの作成が終わるたびに通知する
+
+    @property
+    def nbytes(self) -> int:
+        return sum(copy.nbytes for copy in self._copies.values())
+
+    def has_layout(self, plane: str) -> bool:
+        return plane in self._copies
+
+    def needs_layout(self, plane: str) -> bool:
+        """
+        元のボリュームから切り出した断面の行が連続していない (並べ替えると速くなる) 場合に True。
+        """
+        if plane not in _PLANE_AXES:
+            return False
+        view = self.volume.plane_raw(plane, 0)
+        return view.strides[-1] != view.itemsize
+
+    def plane_raw(self, plane: str, index: int) -> np.ndarray:
+        """
+        指定断面の生ピクセル値を返す (コピーしないビュー)。
+
+        Args:
+            plane (str): "Axial", "Coronal", "Sagittal" のいずれか。
+            index (int): 断面のインデックス。
+
+        Returns:
+            np.ndarray: SeriesVolume.plane_raw と同じ2次元配列。並べ替え済みのコピーが
+                ある場合は C連続。
+        """
+        copy = self._copies.get(plane)
+        if copy is not None:
+            return copy[index]
+        if self.needs_layout(plane):
+            self._request_build(plane)
+        return self.volume.plane_raw(plane, index)
+
+    def _request_build(self, plane: str) -> None:
+        if not self.volume.is_complete:
+            # 読み込み途中のボリュームからコピーを作ると、後から届いたスライスが反映されない
+            return
+        with self._lock:
+            if plane in self._building or plane in self._copies:
+                return
+            if not self._reserve(plane):
+                return
+        threading.Thread(target=self._build, args=(plane,), daemon=True).start()
+
+    def _reserve(self, plane: str) -> bool:
+        # self._lock を持った状態で呼ぶ。作成中のコピーも含めて上限に収まれば、作成中として登録する
+        reserved = self.nbytes + sum(self.volume.nbytes for _ in self._building)
+        if reserved + self.volume.nbytes > self.memory_budget:
+            return False
+        self._building.add(plane)
+        return True
+
+    def _build(self, plane: str) -> None:
+        try:
+            copy = np.ascontiguousarray(self.volume.raw[::-1].transpose(_PLANE_AXES[plane]))
+        except MemoryError as e:
+            print(f"断面レイアウト作成エラー ({plane}): {e}")
+            copy = None
+        with self._lock:
+            self._building.discard(plane)
+            if copy is not None:
+                self._copies[plane] = copy
+            self._built.notify_all()
+
+    def build(self, plane: str) -> bool:
+        """
+        並べ替え済みのコピーをこのスレッドで作る (ベンチマークや事前準備用)。
+        needs_layout に関わらず作る。バックグラウンドで作成中の場合は完了を待つ。
+        作成済み、または作成できた場合は True を返す。
+        """
+        if plane not in _PLANE_AXES:
+            return False
+        with self._lock:
+            while plane in self._building:
+                self._built.wait()
+            if plane in self._copies:
+                return True
+            if not self._reserve(plane):
+                return False
+        self._build(plane)
+        return plane in self._copies
+
+    def clear(self) -> None:
+        with self._lock:
+            self._copies.clear()
+
+
+def benchmark_plane_latency(volume: SeriesVolume, repeats: int = 20, ww=400.0, wl=40.0) -> Dict[str, Dict[str, float]]:
+    """
+    断面ごとに、元のボリュームからの切り出しと並べ替え済みコピーからの切り出しで、
+    断面1枚を表示用 uint8 にするまでの時間 (ms, 中央値) を比べる。
+    切り出しはビューを返すだけなので、W/L 変換で実際に要素を読むまでを計る。
+
+    Returns:
+        Dict[str, Dict[str, float]]: {plane: {'strided_ms', 'layout_ms', 'build_ms'}}
+            Axial は並べ替え不要のため layout_ms は strided_ms と同じ。
+    """
+    layouts = PlaneLayoutCache(volume, memory_budget=2 * volume.nbytes)
+    renderer = WindowLevelRenderer()
+    slope, intercept = volume.uniform_rescale or (1.0, 0.0)
+    sizes = {"Axial": volume.shape[0], "Coronal": volume.shape[1], "Sagittal": volume.shape[2]}
+
+    def measure(get_slice, n_slices):
+        times = []
+        for i in range(repeats):
+            index = (i * 7919) % n_slices  # 毎回違う断面を読む
+            start = time.perf_counter()
+            renderer.render(get_slice(index), ww, wl, slope, intercept)
+            times.append(time.perf_counter() - start)
+        return float(np.median(times) * 1000)
+
+    results = {}
+    for plane, n_slices in sizes.items():
+        strided_ms = measure(lambda i: volume.plane_raw(plane, i), n_slices)
+        entry = {'strided_ms': strided_ms, 'layout_ms': strided_ms, 'build_ms': 0.0}
+        if plane in _PLANE_AXES:
+            start = time.perf_counter()
+            layouts.build(plane)
+            entry['build_ms'] = (time.perf_counter() - start) * 1000
+            entry['layout_ms'] = measure(lambda i: layouts.plane_raw(plane, i), n_slices)
+        results[plane] = entry
+    return results
+
+
+if __name__ == '__main__':
+    # 合成ボリューム (512x512 x 300 スライス) で断面ごとの切り出し時間を比べる
+    rng = np.random.default_rng(0)
+    n_slices = 300
+    raw = rng.integers(-1024, 2000, size=(n_slices, 512, 512), dtype=np.int16)
+    volume = SeriesVolume(raw, np.ones(n_slices, dtype=np.float32), np.zeros(n_slices, dtype=np.float32),
+                          [], None)
+    for plane, entry in benchmark_plane_latency(volume).items():
+        print(f"{plane:8s} strided {entry['strided_ms']:7.2f} ms | layout {entry['layout_ms']:7.2f} ms"
+              f" | build {entry['build_ms']:7.1f} ms")
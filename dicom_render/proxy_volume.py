@@ -0,0 +1,111 @@
+# dicom_render/proxy_volume.py
+
+import threading
+from typing import Tuple
+
+import numpy as np
+
+from dicom_read.read_series import SeriesVolume
+
+DEFAULT_PROXY_BUDGET = 512 * 1024 ** 2   # 512 MB (縮小ボリュームの上限)
+DEFAULT_PROXY_FACTORS = (2, 4)           # 試す縮小率 (小さい順。上限に収まる最初のものを使う)
+DEFAULT_PROXY_MIN_VOXELS = 128 * 512 * 512  # これより小さいボリュームは全解像度でも十分速い
+
+_PLANE_AXIS = {"Axial": 0, "Coronal": 1, "Sagittal": 2}
+
+
+def downsample_volume(volume: SeriesVolume, factor: int) -> SeriesVolume:
+    """
+    各軸を factor 個おきに間引いたボリュームを作る。
+
+    画素は平均せずに間引くため、格納形式 (int16 など) と Slope/Intercept がそのまま使え、
+    W/L の LUT で全解像度と同じ値に変換される。スライスごとの統計は元のボリュームと共有する。
+    """
+    raw = np.ascontiguousarray(volume.raw[::factor, ::factor, ::factor])
+    return SeriesVolume(raw, volume.slopes[::factor].copy(), volume.intercepts[::factor].copy(),
+                        volume.files[::factor], volume.header, series_uid=volume.series_uid,
+                        stats=volume.stats)
+
+
+class ProxyVolume:
+    """
+    W/L ドラッグやスライダー操作中の MPR 描画に使う、縮小した代理ボリューム。
+
+    読み込みが完了したボリュームから、memory_budget に収まる最小の縮小率 (factors の順) で
+    バックグラウンドに作る。min_voxels より小さいボリュームや、どの縮小率でも上限を
+    超える場合は作らない。proxy は作成が終わるまで None。
+    """
+
+    def __init__(self, volume: SeriesVolume, memory_budget: int = DEFAULT_PROXY_BUDGET,
+                 factors: Tuple[int, ...] = DEFAULT_PROXY_FACTORS,
+                 min_voxels: int = DEFAULT_PROXY_MIN_VOXELS):
+        self.volume = volume
+        self.memory_budget = memory_budget
+        self.factors = factors
+        self.min_voxels = min_voxels
+        self.proxy: SeriesVolume | None = None
+        self.factor = 1
+        self._building = False
+        self._lock = threading.Lock()
+
+    @property
+    def nbytes(self) -> int:
+        return self.proxy.nbytes if self.proxy is not None else 0
+
+    def choose_factor(self) -> int | None:
+        """
+        使う縮小率。代理ボリュームを作らない場合は None。
+        """
+        if np.prod(self.volume.shape) < self.min_voxels:
+            return None
+        for factor in self.factors:
+            shape = [(n + factor - 1) // factor for n in self.volume.shape]
+            if np.prod(shape) * self.volume.raw.itemsize <= self.memory_budget:
+                return factor
+        return None
+
+    def request_build(self) -> None:
+        """
+        読み込みが完了していれば、代理ボリュームをバックグラウンドで作り始める。
+        """
+        if not self.volume.is_complete:
+            return
+        with self._lock:
+            if self._building or self.proxy is not None:
+                return
+            factor = self.choose_factor()
+            if factor is None:
+                return
+            self._building = True
+        threading.Thread(target=self._build, args=(factor,), daemon=True).start()
+
+    def _build(self, factor: int) -> None:
+        try:
+            proxy = downsample_volume(self.volume, factor)
+        except MemoryError as e:
+            print(f"縮小ボリューム作成エラー: {e}")
+            proxy = None
+        with self._lock:
+            self._building = False
+            if proxy is not None:
+                self.factor = factor
+                self.proxy = proxy
+
+    def get(self) -> SeriesVolume | None:
+        """
+        作成済みの代理ボリュームを返す。未作成の場合は作成を始めて None を返す。
+        """
+        if self.proxy is None:
+            self.request_build()
+        return self.proxy
+
+    def plane_index(self, plane: str, index: int) -> int:
+        """
+        全解像度の断面インデックスを、代理ボリュームの断面インデックスに変換する。
+        """
+        return min(index // self.factor, self.proxy.shape[_PLANE_AXIS[plane]] - 1)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.proxy = None
+            self.factor = 1
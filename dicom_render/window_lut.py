@@ -0,0 +1,94 @@
+# dicom_render/window_lut.py
+
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+from dicom_perf.trace import tracer, traced
+
+# LUT で変換できる生ピクセル値の型と、LUT の添字として見る型
+_LUT_INDEX_DTYPES = {
+    np.dtype(np.int16): np.dtype(np.uint16),
+    np.dtype(np.uint16): np.dtype(np.uint16),
+    np.dtype(np.int8): np.dtype(np.uint8),
+    np.dtype(np.uint8): np.dtype(np.uint8),
+}
+
+
+def apply_window(hu: np.ndarray, ww: float, wl: float, out: np.ndarray | None = None) -> np.ndarray:
+    """
+    HU値 (float) に W/L を適用して 0-255 の uint8 に変換する。
+    LUT を使えない場合 (Rescale が断面内で一様でないなど) の経路。
+    """
+    lower, upper = wl - ww / 2, wl + ww / 2
+    display_array = np.clip(hu, lower, upper)
+    display_array = (display_array - lower) / ww * 255
+    if out is None:
+        return display_array.astype(np.uint8)
+    np.copyto(out, display_array, casting='unsafe')
+    return out
+
+
+@lru_cache(maxsize=16)
+def build_window_lut(ww: float, wl: float, slope: float, intercept: float, dtype_str: str) -> np.ndarray:
+    """
+    生ピクセル値のとりうる全ての値について、HU変換と W/L 適用の結果を並べた LUT を作る。
+
+    16bit の場合は 65536 要素、8bit の場合は 256 要素。添字は生ピクセル値のビット列を
+    符号なし整数として見た値 (int16 の -1 は 65535) になる。計算は apply_window と同じ
+    float32 の演算で行うため、LUT 経由でも直接計算と同じ結果になる。
+    """
+    dtype = np.dtype(dtype_str)
+    index_dtype = _LUT_INDEX_DTYPES[dtype]
+    with tracer.span('build_window_lut'):
+        values = np.arange(2 ** (8 * index_dtype.itemsize), dtype=np.int64).astype(index_dtype).view(dtype)
+        hu = values.astype(np.float32) * np.float32(slope) + np.float32(intercept)
+        lut = apply_window(hu, ww, wl)
+    lut.setflags(write=False)
+    return lut
+
+
+class WindowLevelRenderer:
+    """
+    生ピクセル値の断面を W/L 適用済みの uint8 画像に変換する。
+
+    (WW, WL, Slope, Intercept) ごとに LUT を一度だけ作り、各フレームは np.take 1回で
+    出力バッファへ書き込む。出力バッファは断面サイズが変わらない限り使い回すため、
+    表示先 (ビュー) ごとに1つのインスタンスを使う。
+    """
+
+    def __init__(self):
+        self._out = None
+
+    def _output_buffer(self, shape: Tuple[int, int]) -> np.ndarray:
+        if self._out is None or self._out.shape != shape:
+            self._out = np.empty(shape, dtype=np.uint8)
+        return self._out
+
+    @traced('wl_render')
+    def render(self, raw: np.ndarray, ww: float, wl: float, slope=1.0, intercept=0.0,
+               out: np.ndarray | None = None) -> np.ndarray:
+        """
+        Args:
+            raw (np.ndarray): 生ピクセル値の2次元配列 (ストライドのあるビューでもよい)。
+            ww (float), wl (float): ウィンドウ幅・ウィンドウレベル。
+            slope, intercept: スカラー、または raw にブロードキャストできる配列。
+            out (np.ndarray | None): 書き込み先の uint8 配列 (raw と同じ形状)。
+                None の場合はインスタンスの出力バッファを使う。
+
+        Returns:
+            np.ndarray: 0-255 の uint8 画像 (C連続)。out を省略した場合は、
+                次の render 呼び出しで上書きされる。
+        """
+        if out is None:
+            out = self._output_buffer(raw.shape)
+        index_dtype = _LUT_INDEX_DTYPES.get(raw.dtype)
+
+        if index_dtype is not None and np.ndim(slope) == 0 and np.ndim(intercept) == 0:
+            lut = build_window_lut(float(ww), float(wl), float(slope), float(intercept), raw.dtype.str)
+            np.take(lut, raw.view(index_dtype), out=out, mode='clip')
+            return out
+
+        hu = raw.astype(np.float32) * slope + intercept
+        return apply_window(hu, ww, wl, out=out)
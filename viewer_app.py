@@ -1,7 +1,6 @@
 import sys
 import os
 import numpy as np
-import pydicom
 from PIL import Image
 
 from PySide6.QtWidgets import (
@@ -12,6 +11,8 @@ from PySide6.QtWidgets import (
 from PySide6.QtCore import Qt, Signal, QSize, QRectF # QRectFは描画時の座標計算に役立つ
 from PySide6.QtGui import QPixmap, QImage, QPainter, QMouseEvent, QWheelEvent, QFont, QColor # QColorを追加
 
+from dicom_read import slice_cache
+
 # --- 1. 定数・ヘルパー関数 ---
 NON_COMPRESSED_UIDS = {'1.2.840.10008.1.2', '1.2.840.10008.1.2.1'}
 
@@ -146,6 +147,12 @@ class PyQtDicomViewer(QMainWindow):
         self.pixel_min, self.pixel_max = 0, 4095
         self.hu_data = None
         
+        # デコード済みスライスのキャッシュと先読み (移動方向に prefetch_slices 枚)
+        self.slice_cache = None
+        self.slice_cache_bytes = slice_cache.DEFAULT_MAX_BYTES
+        self.prefetch_slices = slice_cache.DEFAULT_PREFETCH
+        self._last_index = 0
+        
         self.ww, self.wl = 400.0, 40.0
 
         self.create_menu()
@@ -281,7 +288,12 @@ class PyQtDicomViewer(QMainWindow):
             QMessageBox.critical(self, "エラー", "DICOMファイルが見つかりませんでした。")
             return
 
+        if self.slice_cache is not None:
+            self.slice_cache.shutdown()
+        self.slice_cache = slice_cache.SliceCache(self.files, self.slice_cache_bytes, self.prefetch_slices)
+
         self.index = 0
+        self._last_index = 0
         self.slice_slider.setRange(0, len(self.files) - 1)
         self.load_image(is_new_series=True)
         
@@ -289,23 +301,15 @@ class PyQtDicomViewer(QMainWindow):
         if not self.files: return
         
         try:
-            filepath = self.files[self.index]
-            self.ds = pydicom.dcmread(filepath)
-            
-            # 1. HU変換 (生のピクセルデータから)
-            raw_array = self.ds.pixel_array
+            # 1. HU変換済みのスライスをキャッシュから取得 (無い場合はここでデコードする)
+            entry = self.slice_cache.get(self.index)
+            self.ds = entry.ds
+            self.hu_data = entry.hu
             
-            is_big_endian = not self.ds.file_meta.TransferSyntaxUID.is_little_endian
-            
-            if is_big_endian:
-                # Big Endianの場合、強制的にバイトスワップを行う
-                raw_array = raw_array.byteswap().newbyteorder('S')
-            
-            # 2. Rescale処理
-            pixel_array = raw_array.astype(np.float32)
-            slope = getattr(self.ds, 'RescaleSlope', 1.0)
-            intercept = getattr(self.ds, 'RescaleIntercept', 0.0)
-            self.hu_data = pixel_array * slope + intercept
+            # 2. 移動方向の次のスライスをバックグラウンドで先読みする
+            direction = int(np.sign(self.index - self._last_index))
+            self._last_index = self.index
+            self.slice_cache.prefetch(self.index, direction)
             
             if is_new_series:
                 self.pixel_min = int(self.hu_data.min())
@@ -319,6 +323,7 @@ class PyQtDicomViewer(QMainWindow):
             
             self.slice_slider.setValue(self.index)
             self.image_widget.zoom_factor, self.image_widget.pan_x, self.image_widget.pan_y = 1.0, 0, 0
+            self.update_info_panel()
 
         except Exception as e:
             QMessageBox.critical(self, "読み込みエラー", f"ファイル '{os.path.basename(self.files[self.index])}' の読み込みエラー: {e}")
@@ -398,6 +403,10 @@ class PyQtDicomViewer(QMainWindow):
             "ズーム": f"{self.image_widget.zoom_factor:.2f}",
             "エンディアン": endian_info
         }
+        if self.slice_cache is not None:
+            cache = self.slice_cache
+            info["キャッシュ"] = (f"ヒット率 {cache.hit_rate:.0%} ({cache.hits}/{cache.hits + cache.misses}), "
+                               f"先読み {cache.prefetched}, {cache.nbytes / 1024 ** 2:.0f} MB")
         
         info_text = ""
         for key, value in info.items():
@@ -439,6 +448,11 @@ class PyQtDicomViewer(QMainWindow):
             self.index -= 1
             self.load_image()
 
+    def closeEvent(self, event):
+        if self.slice_cache is not None:
+            self.slice_cache.shutdown()
+        super().closeEvent(event)
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
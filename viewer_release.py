@@ -1,5 +1,9 @@
 import sys
 import os
+import time
+import math
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import numpy as np
 import pydicom
 from PIL import Image
@@ -8,26 +12,129 @@ from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QSplitter,
     QLabel, QPushButton, QSlider, QLineEdit, QFileDialog, QTextEdit,
     QMenuBar, QMenu, QMessageBox, QSizePolicy, QComboBox, QDialog, QGridLayout,
-    QStackedWidget
+    QStackedWidget, QProgressBar, QDockWidget, QTableWidget, QTableWidgetItem, QAbstractItemView,
+    QHeaderView
 )
-from PySide6.QtCore import Qt, Signal, QSize, QRectF
+from PySide6.QtCore import Qt, Signal, QSize, QRectF, QPointF, QThread, QTimer, QObject
 from PySide6.QtGui import QPixmap, QImage, QPainter, QMouseEvent, QWheelEvent, QFont, QColor
 
+from dicom_read import read_series, volume_cache, volume_stats, series_index
+from dicom_render.window_lut import WindowLevelRenderer
+from dicom_render.plane_layout import PlaneLayoutCache, DEFAULT_LAYOUT_BUDGET
+from dicom_render.proxy_volume import ProxyVolume, DEFAULT_PROXY_BUDGET
+from dicom_render.oblique import ObliquePlane, ObliqueResampler, DEFAULT_OBLIQUE_WORKERS
+from dicom_perf.hud import PerfStats
+from dicom_perf.trace import tracer, traced, TRACE_FILE_ENV
+
 # --- 1. 定数・ヘルパー関数 ---
 NON_COMPRESSED_UIDS = {'1.2.840.1.2', '1.2.840.1.2.1'}
+DEFAULT_MAX_FPS = 60
+MPR_RENDER_WORKERS = 3  # MPR の3断面を並列に描画する
+DEFAULT_REFINE_DELAY_MS = 150  # 操作が止まってから全解像度で描き直すまでの時間
+# 性能HUDに表示するキャッシュ (PerfStats.record_cache の名前と表示名)
+PERF_HUD_CACHES = {'pixmap': "拡大縮小キャッシュ", 'volume': "ボリュームキャッシュ"}
+
+_QIMAGE_FORMATS = {
+    1: QImage.Format_Grayscale8,
+    3: QImage.Format_RGB888,
+    4: QImage.Format_RGBA8888,
+}
 
 def numpy_to_qimage(array_255: np.ndarray) -> QImage:
+    """
+    uint8 のグレースケール (h, w) または RGB/RGBA (h, w, 3|4) 配列を QImage にする。
+
+    行内の画素が連続していれば、行間のストライドを bytesPerLine として渡し、コピーせずに
+    配列のメモリをそのまま使う。上下反転ビュー (負のストライド) や列方向に飛び飛びの
+    ビューなど、そのままでは渡せない場合だけ連続した配列にコピーする。
+    QImage は配列のメモリを参照するため、配列への参照を QImage に持たせて、
+    QImage より先に解放されないようにする。
+    """
     if array_255.dtype != np.uint8:
         array_255 = array_255.astype(np.uint8)
-        
-    height, width = array_255.shape
-    qimage = QImage(array_255.data, width, height, width, QImage.Format_Grayscale8)
+    
+    channels = 1 if array_255.ndim == 2 else array_255.shape[2]
+    if channels not in _QIMAGE_FORMATS:
+        raise ValueError(f"未対応の画像形式です: shape={array_255.shape}")
+    
+    height, width = array_255.shape[:2]
+    row_stride = array_255.strides[0]
+    pixels_contiguous = (array_255.strides[1] == channels
+                         and (channels == 1 or array_255.strides[2] == 1))
+    if not pixels_contiguous or row_stride < width * channels:
+        array_255 = np.ascontiguousarray(array_255)
+        row_stride = array_255.strides[0]
+    
+    # 行間に隙間がある (ボリュームの断面ビューなど) 場合も渡せるよう、先頭行から最終行までを
+    # 覆う1次元のバイト列ビューとして渡す (隙間は同じ元配列の一部なので読み出しても安全)
+    span = (height - 1) * row_stride + width * channels
+    buffer = np.lib.stride_tricks.as_strided(array_255, shape=(span,), strides=(1,), writeable=False)
+    
+    qimage = QImage(buffer.data, width, height, row_stride, _QIMAGE_FORMATS[channels])
+    qimage._numpy_buffer = array_255
     return qimage
 
 
+class FramePacer(QObject):
+    """
+    W/L・パン・ズーム・スライス移動などの描画要求を、一定間隔のフレームにまとめるタイマー。
+
+    同じキーの要求はフレームまでに何度来ても最後の1つだけが実行され、
+    上書きされた要求は間引き (dropped) として数える。
+    """
+    frame_done = Signal()
+
+    def __init__(self, max_fps=DEFAULT_MAX_FPS, parent=None):
+        super().__init__(parent)
+        self._pending = {}  # キー -> 最新のコールバック (要求順を保持)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._run_frame)
+        self._last_frame_time = 0.0
+        self._frame_times = deque(maxlen=60)
+        self.set_max_fps(max_fps)
+        
+        self.requested = 0
+        self.dropped = 0
+        self.frames = 0
+
+    def set_max_fps(self, max_fps):
+        self.max_fps = max(1, int(max_fps))
+        self._interval = 1.0 / self.max_fps
+
+    @property
+    def fps(self):
+        if len(self._frame_times) < 2: return 0.0
+        span = self._frame_times[-1] - self._frame_times[0]
+        return (len(self._frame_times) - 1) / span if span > 0 else 0.0
+
+    def request(self, key, callback):
+        self.requested += 1
+        if key in self._pending:
+            self.dropped += 1
+        self._pending[key] = callback
+        
+        if not self._timer.isActive():
+            # 前のフレームから間隔が空いていればすぐ、そうでなければ次のフレーム時刻に実行する
+            wait = self._interval - (time.perf_counter() - self._last_frame_time)
+            self._timer.start(max(0, int(wait * 1000)))
+
+    def _run_frame(self):
+        pending, self._pending = self._pending, {}
+        self._last_frame_time = time.perf_counter()
+        self._frame_times.append(self._last_frame_time)
+        for callback in pending.values():
+            callback()
+        self.frames += 1
+        self.frame_done.emit()
+
+
 # --- 2. カスタム画像表示ウィジェット（W/L, ズーム, パン, 参照線対応） ---
 class ImageDisplayWidget(QLabel):
     wwl_changed = Signal(float, float)
+    interaction_finished = Signal()
+    # MPR の Axial ビューで Shift+左ドラッグしたときの斜断面の方位 (度, 0〜180)
+    oblique_rotated = Signal(float)
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -56,6 +163,20 @@ class ImageDisplayWidget(QLabel):
         self.pixel_spacing_xy = 1.0
         self.pixel_spacing_z = 1.0
         
+        # 拡大縮小済みの QPixmap キャッシュ: ((画像バッファ, 描画サイズ, アスペクト補正), QPixmap)
+        # パンや再描画 (expose) では作り直さず、描画位置だけを変える
+        self._pixmap_cache = None
+        
+        # 描画要求をフレームにまとめる FramePacer (None の場合はすぐに update する)
+        self.frame_pacer = None
+        # デバッグ用の表示 (左上)
+        self.debug_info = ""
+        # 性能HUD (右下) の統計。None の場合は計測も表示もしない
+        self.perf_stats = None
+        self._image_fresh = False  # 新しい画像をまだペイントしていない
+        # 直近のペイントで画像を描いた範囲 (マウス位置から画像上の位置を求めるのに使う)
+        self._image_rect = None
+        
     def set_image_data(self, data_255: np.ndarray, ww, wl, slice_info="", indices=None, plane=None, is_mpr=False, spacing_xy=1.0, spacing_z=1.0):
         self.img_data_255 = data_255
         self.ww, self.wl = ww, wl
@@ -69,19 +190,52 @@ class ImageDisplayWidget(QLabel):
         self.pixel_spacing_xy = spacing_xy
         self.pixel_spacing_z = spacing_z
         
+        # 同じバッファが上書き再利用されることがあるため、画像が渡されたら必ず破棄する
+        self.invalidate_pixmap_cache()
+        self._image_fresh = True
+        self.update()
+
+    def request_repaint(self):
+        if self.frame_pacer is None:
+            self.update()
+        else:
+            self.frame_pacer.request(self, self.update)
+
+    def set_overlay_info(self, slice_info, indices):
+        # 画像はそのままで、参照線とスライス情報だけを更新する (拡大縮小済み画像は再利用)
+        self.slice_info = slice_info
+        self.current_slice_indices = indices
         self.update()
 
+    def invalidate_pixmap_cache(self):
+        self._pixmap_cache = None
+
+    def _scaled_pixmap(self, draw_w, draw_h, aspect_ratio_correction):
+        key = (id(self.img_data_255), draw_w, draw_h, aspect_ratio_correction)
+        hit = self._pixmap_cache is not None and self._pixmap_cache[0] == key
+        if self.perf_stats is not None:
+            self.perf_stats.record_cache('pixmap', hit)
+        if not hit:
+            tracer.count('pixmap_cache_miss')
+            with tracer.span('qimage_scaled'):
+                qimage = numpy_to_qimage(self.img_data_255)
+                pixmap = QPixmap.fromImage(qimage.scaled(draw_w, draw_h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            self._pixmap_cache = (key, pixmap)
+        else:
+            tracer.count('pixmap_cache_hit')
+        return self._pixmap_cache[1]
+
+    @traced('paint')
     def paintEvent(self, event):
         if self.img_data_255 is None:
             super().paintEvent(event)
             return
 
+        paint_start = time.perf_counter()
         painter = QPainter(self)
         try:
             rect = self.contentsRect()
             
-            qimage = numpy_to_qimage(self.img_data_255)
-            
             img_w, img_h = self.image_size
             
             # --- 描画アスペクト比の計算 ---
@@ -103,9 +257,10 @@ class ImageDisplayWidget(QLabel):
             paste_x = (rect.width() - draw_w) // 2 + self.pan_x
             paste_y = (rect.height() - draw_h) // 2 + self.pan_y
             
-            # 1. 画像の描画 
-            pixmap = QPixmap.fromImage(qimage.scaled(draw_w, draw_h, Qt.IgnoreAspectRatio, Qt.SmoothTransformation))
+            # 1. 画像の描画 (拡大縮小はキャッシュし、パンでは描画位置だけを変える)
+            pixmap = self._scaled_pixmap(draw_w, draw_h, aspect_ratio_correction)
             painter.drawPixmap(paste_x, paste_y, pixmap)
+            self._image_rect = QRectF(paste_x, paste_y, draw_w, draw_h)
             
             # 2. 参照線とスライス情報の描画 
             is_mpr_view = self._is_mpr_view
@@ -115,8 +270,8 @@ class ImageDisplayWidget(QLabel):
             if self.parent():
                 mpr_widget = self.parent().parent()
             
-            if mpr_widget and hasattr(mpr_widget, 'all_slices_hu'):
-                hu_data = mpr_widget.all_slices_hu
+            if mpr_widget and hasattr(mpr_widget, 'volume'):
+                hu_data = mpr_widget.volume
 
             if is_mpr_view and self.current_slice_indices is not None and hu_data is not None:
                 
@@ -135,6 +290,18 @@ class ImageDisplayWidget(QLabel):
                     painter.setPen(QColor(0, 0, 255)) # Sagittal line (X-line)
                     painter.drawLine(x_pos, img_rect.top(), x_pos, img_rect.bottom())
                     
+                    oblique_azimuth = getattr(mpr_widget, 'oblique_azimuth', None)
+                    if oblique_azimuth is not None and mpr_widget.oblique is not None:
+                        # 斜断面の線 (中心を通り、方位の向き)。画像の外は描かない
+                        angle = math.radians(oblique_azimuth)
+                        length = img_rect.width() + img_rect.height()
+                        dx, dy = math.cos(angle) * length, math.sin(angle) * length
+                        painter.save()
+                        painter.setClipRect(img_rect)
+                        painter.setPen(QColor(255, 255, 0))
+                        painter.drawLine(QPointF(x_pos - dx, y_pos - dy), QPointF(x_pos + dx, y_pos + dy))
+                        painter.restore()
+                    
                 elif self.current_plane == "Coronal":
                     # Z軸 (縦) はZインデックスが0で画像上部に対応
                     z_ratio = z / max_z
@@ -165,13 +332,58 @@ class ImageDisplayWidget(QLabel):
                 text_x = paste_x + 10
                 text_y = paste_y + draw_h - 10 
                 painter.drawText(text_x, text_y, self.slice_info)
+            
+            # デバッグ情報 (左上)
+            if self.debug_info:
+                painter.setPen(QColor(0, 255, 255))
+                painter.setFont(QFont("Arial", 10))
+                painter.drawText(rect.left() + 8, rect.top() + 18, self.debug_info)
+            
+            # 性能HUD (右下)
+            if self.perf_stats is not None:
+                self._draw_perf_hud(painter, rect)
 
         finally:
             painter.end()
+            if self.perf_stats is not None:
+                self.perf_stats.record_paint(self, paint_start, time.perf_counter(), self._image_fresh)
+            self._image_fresh = False
+
+    def _draw_perf_hud(self, painter, rect):
+        # 表示する値は前回までのペイントの統計 (このペイントの時間は終了後に記録する)
+        lines = self.perf_stats.format_lines(self, PERF_HUD_CACHES)
+        painter.setFont(QFont("Courier New", 9))
+        metrics = painter.fontMetrics()
+        line_h = metrics.height()
+        box_w = max(metrics.horizontalAdvance(line) for line in lines) + 12
+        box_h = line_h * len(lines) + 8
+        box = QRectF(rect.right() - box_w - 8, rect.bottom() - box_h - 8, box_w, box_h)
+        painter.fillRect(box, QColor(0, 0, 0, 160))
+        painter.setPen(QColor(0, 255, 0))
+        for i, line in enumerate(lines):
+            painter.drawText(int(box.left()) + 6, int(box.top()) + 4 + metrics.ascent() + i * line_h, line)
+
+    def _oblique_drag_angle(self, pos):
+        # Axial の参照線の交点からマウス位置への向き (度, 0〜180)。対象外の場合は None
+        if not (self._is_mpr_view and self.current_plane == "Axial"
+                and self.current_slice_indices is not None and self._image_rect is not None):
+            return None
+        _, y, x = self.current_slice_indices
+        max_y, max_x = self.image_size[1], self.image_size[0]
+        rect = self._image_rect
+        center_x = rect.left() + x / max_x * rect.width()
+        center_y = rect.top() + y / max_y * rect.height()
+        dx, dy = pos.x() - center_x, pos.y() - center_y
+        if dx == 0 and dy == 0: return None
+        return math.degrees(math.atan2(dy, dx)) % 180.0
 
     def mousePressEvent(self, event: QMouseEvent):
         self._last_mouse_pos = event.pos()
         
+        if event.button() == Qt.LeftButton and event.modifiers() & Qt.ShiftModifier:
+            angle = self._oblique_drag_angle(event.pos())
+            if angle is not None:
+                self.oblique_rotated.emit(angle)
         if event.button() == Qt.LeftButton:
             self.setCursor(Qt.ClosedHandCursor)
         elif event.button() == Qt.RightButton:
@@ -183,7 +395,13 @@ class ImageDisplayWidget(QLabel):
         dx = event.x() - self._last_mouse_pos.x()
         dy = event.y() - self._last_mouse_pos.y()
 
-        if event.buttons() & Qt.LeftButton:
+        if event.buttons() & Qt.LeftButton and event.modifiers() & Qt.ShiftModifier:
+            # Shift+左ドラッグ: 斜断面の線を回す (W/L は変えない)
+            angle = self._oblique_drag_angle(event.pos())
+            if angle is not None:
+                self.oblique_rotated.emit(angle)
+            
+        elif event.buttons() & Qt.LeftButton:
             self.ww += dx
             self.wl -= dy
             self.wwl_changed.emit(self.ww, self.wl)
@@ -191,28 +409,75 @@ class ImageDisplayWidget(QLabel):
         elif event.buttons() & Qt.RightButton:
             self.pan_x += dx
             self.pan_y += dy
-            self.update()
+            self.request_repaint()
             
         self._last_mouse_pos = event.pos()
 
     def mouseReleaseEvent(self, event: QMouseEvent):
         self._last_mouse_pos = None
         self.setCursor(Qt.OpenHandCursor)
+        self.interaction_finished.emit()
 
     def wheelEvent(self, event: QWheelEvent):
         delta = event.angleDelta().y()
         factor = 1.1 if delta > 0 else 1 / 1.1
         self.zoom_factor *= factor
-        self.update()
+        self.invalidate_pixmap_cache()
+        self.request_repaint()
+
+    def resizeEvent(self, event):
+        self.invalidate_pixmap_cache()
+        super().resizeEvent(event)
 
 
 # --- 3. MPRビューコンテナウィジェット (メインウィンドウに格納) ---
 class MPRViewWidget(QWidget):
+    # ワーカースレッドで描画した断面を GUI スレッドへ渡す (plane, ジョブ, uint8 画像)
+    plane_rendered = Signal(str, object, object)
+    
     def __init__(self, parent: 'PyQtDicomViewer'):
         super().__init__(parent)
         self.parent = parent
-        self.all_slices_hu = None
+        self.volume = None
         self.current_indices = None
+        # ビューごとの W/L 変換 (LUT と出力バッファを保持)
+        self.renderers = {plane: WindowLevelRenderer() for plane in ("Axial", "Coronal", "Sagittal")}
+        self.planes = ("Axial", "Coronal", "Sagittal", "Oblique")
+        
+        # 斜断面: Axial の交点を通り、方位 (Axial 面内の向き) と傾き (z 軸からの角度) で決まる断面。
+        # 補間の並列化用のプールはボリュームが替わっても使い回す
+        self.oblique = None  # ObliqueResampler
+        self.oblique_azimuth = 0.0
+        self.oblique_tilt = 0.0
+        self._oblique_pool = ThreadPoolExecutor(max_workers=DEFAULT_OBLIQUE_WORKERS,
+                                                thread_name_prefix='oblique')
+        
+        # 更新スケジューラ: 同じイベントループ周回内の変更をまとめ、変化した断面だけを描画する
+        # plane -> (断面インデックス, WW, WL)。要求した時点で記録し、描画に失敗したら取り消す
+        self._rendered_state = {}
+        self._force_render = set()  # データ自体が変わったため必ず描画し直す断面
+        self._proxy_planes = set()  # 縮小ボリュームで描画した (全解像度で描き直す必要がある) 断面
+        self._update_timer = QTimer(self)
+        self._update_timer.setSingleShot(True)
+        self._update_timer.setInterval(0)
+        self._update_timer.timeout.connect(self._flush_updates)
+        
+        # 断面の切り出しと W/L 変換はワーカーで行う (NumPy が GIL を解放するため並列に進む)。
+        # 断面ごとに実行中のジョブは1つまでとし、その間の要求は最新の1つだけを待たせる。
+        # 結果は要求ID が最新のものだけを表示し、古い結果は捨てる
+        self._render_pool = ThreadPoolExecutor(max_workers=MPR_RENDER_WORKERS,
+                                               thread_name_prefix='mpr-render')
+        self._request_ids = {plane: 0 for plane in self.planes}
+        self._in_flight = {plane: False for plane in self.planes}
+        self._queued_jobs = {plane: None for plane in self.planes}
+        self.plane_rendered.connect(self._on_plane_rendered)
+        # 計測用カウンタ
+        self.update_requests = 0
+        self.flush_count = 0
+        self.render_counts = {plane: 0 for plane in self.planes}
+        self.stale_results = 0
+        self.render_errors = 0
+        self.last_flush_renders = []
         
         self.setup_ui()
         
@@ -227,6 +492,9 @@ class MPRViewWidget(QWidget):
         self.axial_view = self.axial_container.findChild(ImageDisplayWidget)
         self.coronal_view = self.coronal_container.findChild(ImageDisplayWidget)
         self.sagittal_view = self.sagittal_container.findChild(ImageDisplayWidget)
+        self.oblique_container = self._create_oblique_container()
+        self.oblique_view = self.oblique_container.findChild(ImageDisplayWidget)
+        self.axial_view.oblique_rotated.connect(self.set_oblique_azimuth)
         
         # レイアウト
         grid_layout.addWidget(QLabel("Axial", alignment=Qt.AlignCenter), 0, 0)
@@ -234,8 +502,10 @@ class MPRViewWidget(QWidget):
         grid_layout.addWidget(self.axial_container, 1, 0)
         grid_layout.addWidget(self.coronal_container, 1, 1)
         
-        grid_layout.addWidget(QLabel("Sagittal", alignment=Qt.AlignCenter), 2, 0, 1, 2)
-        grid_layout.addWidget(self.sagittal_container, 3, 0, 1, 2)
+        grid_layout.addWidget(QLabel("Sagittal", alignment=Qt.AlignCenter), 2, 0)
+        grid_layout.addWidget(QLabel("Oblique (Axial で Shift+ドラッグして回転)", alignment=Qt.AlignCenter), 2, 1)
+        grid_layout.addWidget(self.sagittal_container, 3, 0)
+        grid_layout.addWidget(self.oblique_container, 3, 1)
         
         # 拡張設定
         grid_layout.setRowStretch(1, 1) 
@@ -276,30 +546,99 @@ class MPRViewWidget(QWidget):
 
         h_layout_main.addLayout(v_container, 1)
         
+        for slider in (v_slider, h_slider):
+            slider.sliderReleased.connect(self.parent.end_interaction)
+        
         setattr(view, 'v_slider', v_slider)
         setattr(view, 'h_slider', h_slider)
         
         view.wwl_changed.connect(self.parent.update_wwl_from_mouse)
+        view.interaction_finished.connect(self.parent.end_interaction)
+        view.frame_pacer = self.parent.frame_pacer
         
         return container
 
 
-    def load_mpr_data(self, hu_data_3d):
-        self.all_slices_hu = hu_data_3d
-        z, y, x = hu_data_3d.shape[0] // 2, hu_data_3d.shape[1] // 2, hu_data_3d.shape[2] // 2
+    def _create_oblique_container(self):
+        # 斜断面ビュー: 横スライダーで方位、縦スライダーで傾きを変える
+        container = QWidget(self)
+        h_layout_main = QHBoxLayout(container)
+        h_layout_main.setContentsMargins(0, 0, 0, 0)
+        h_layout_main.setSpacing(0)
+        
+        view = ImageDisplayWidget(container)
+        view.current_plane = "Oblique"
+        view._is_mpr_view = True
+        
+        v_slider = QSlider(Qt.Vertical)
+        v_slider.setRange(-80, 80)
+        v_slider.valueChanged.connect(lambda v: self.set_oblique_tilt(v))
+        h_layout_main.addWidget(v_slider, 0)
+        
+        v_container = QVBoxLayout()
+        v_container.setContentsMargins(0, 0, 0, 0)
+        v_container.setSpacing(0)
+        view.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
+        v_container.addWidget(view, 1)
+        
+        h_slider = QSlider(Qt.Horizontal)
+        h_slider.setRange(0, 179)
+        h_slider.valueChanged.connect(lambda v: self.set_oblique_azimuth(v))
+        v_container.addWidget(h_slider, 0)
+        h_layout_main.addLayout(v_container, 1)
+        
+        for slider in (v_slider, h_slider):
+            slider.sliderReleased.connect(self.parent.end_interaction)
+        
+        setattr(view, 'v_slider', v_slider)
+        setattr(view, 'h_slider', h_slider)
+        
+        view.wwl_changed.connect(self.parent.update_wwl_from_mouse)
+        view.interaction_finished.connect(self.parent.end_interaction)
+        view.frame_pacer = self.parent.frame_pacer
+        
+        return container
+
+    def set_oblique_azimuth(self, degrees):
+        self.oblique_azimuth = float(degrees) % 180.0
+        self.parent.begin_interaction()
+        self.update_all_views()
+        # Axial の斜断面の線は画像を描き直さずに動かす
+        self.axial_view.update()
+
+    def set_oblique_tilt(self, degrees):
+        self.oblique_tilt = float(degrees)
+        self.parent.begin_interaction()
+        self.update_all_views()
+
+    def load_mpr_data(self, volume):
+        self.volume = volume
+        shape = volume.shape
+        z, y, x = shape[0] // 2, shape[1] // 2, shape[2] // 2
         self.current_indices = [z, y, x]
         
         # スライダーのレンジをデータサイズに合わせて更新
-        self.axial_view.v_slider.setRange(0, hu_data_3d.shape[1] - 1)
-        self.axial_view.h_slider.setRange(0, hu_data_3d.shape[2] - 1)
+        self.axial_view.v_slider.setRange(0, shape[1] - 1)
+        self.axial_view.h_slider.setRange(0, shape[2] - 1)
+        
+        self.coronal_view.v_slider.setRange(0, shape[0] - 1)
+        self.coronal_view.h_slider.setRange(0, shape[2] - 1)
         
-        self.coronal_view.v_slider.setRange(0, hu_data_3d.shape[0] - 1)
-        self.coronal_view.h_slider.setRange(0, hu_data_3d.shape[2] - 1)
+        self.sagittal_view.v_slider.setRange(0, shape[0] - 1)
+        self.sagittal_view.h_slider.setRange(0, shape[1] - 1)
         
-        self.sagittal_view.v_slider.setRange(0, hu_data_3d.shape[0] - 1)
-        self.sagittal_view.h_slider.setRange(0, hu_data_3d.shape[1] - 1)
+        # 斜断面はボクセルの物理間隔 (スライス間隔, 行, 列) に合わせて等方にサンプリングする
+        sp_y, sp_x, st = 1.0, 1.0, 1.0
+        if self.parent.pixel_spacing is not None and self.parent.slice_thickness:
+            sp_y, sp_x = self.parent.pixel_spacing
+            st = self.parent.slice_thickness
+        spacing = (float(st), float(sp_y), float(sp_x))
+        if self.oblique is None or self.oblique.volume is not volume or self.oblique.spacing != spacing:
+            if self.oblique is not None:
+                self.oblique.shutdown()
+            self.oblique = ObliqueResampler(volume, spacing, pool=self._oblique_pool)
 
-        self.update_all_views()
+        self.update_all_views(force=True)
 
     def _update_mpr_index_from_slider(self, plane, axis, value):
         if self.current_indices is None: return
@@ -314,14 +653,33 @@ class MPRViewWidget(QWidget):
             new_indices[2] = value
             
         self.current_indices = new_indices
+        self.parent.mark_input('slice')
+        self.parent.begin_interaction()
         self.update_all_views()
 
-    def update_all_views(self):
-        if self.all_slices_hu is None or self.current_indices is None: return
+    def update_all_views(self, force=False):
+        """
+        インデックスや W/L の変更を受け付け、次のイベントループ周回でまとめて描画する。
+        force=True はボリュームのデータ自体が変わった場合 (読み込み途中など) に使う。
+        """
+        if self.volume is None or self.current_indices is None: return
+        
+        self.update_requests += 1
+        tracer.count('mpr_update_requests')
+        if force:
+            self._force_render.update(self.planes)
+        if self.parent.frame_pacer is not None:
+            # 描画はフレーム単位でまとめる
+            self.parent.frame_pacer.request(self, self._flush_updates)
+        elif not self._update_timer.isActive():
+            self._update_timer.start()
+
+    @traced('mpr_flush')
+    def _flush_updates(self):
+        if self.volume is None or self.current_indices is None: return
         
         z, y, x = self.current_indices
         ww, wl = self.parent.ww, self.parent.wl
-        lower, upper = wl - ww / 2, wl + ww / 2
         
         pixel_spacing = self.parent.pixel_spacing 
         slice_thickness = self.parent.slice_thickness 
@@ -333,47 +691,246 @@ class MPRViewWidget(QWidget):
         
         views_map = {
             # 縦Y/横X, 縦Z/横X, 縦Z/横Y の順でピクセル間隔を渡す
-            "Axial": (self.axial_view, z, st, sp_y),
-            "Coronal": (self.coronal_view, y, st, sp_x), 
-            "Sagittal": (self.sagittal_view, x, st, sp_y), 
+            "Axial": (self.axial_view, z, st, sp_y, (y, x)),
+            "Coronal": (self.coronal_view, y, st, sp_x, (z, x)), 
+            "Sagittal": (self.sagittal_view, x, st, sp_y, (z, y)), 
         }
         
-        for plane, (view, index, spacing_z, spacing_xy) in views_map.items():
-            if plane == "Axial":
-                hu_slice = self.all_slices_hu[index, :, :]
-                view.v_slider.setValue(y) 
-                view.h_slider.setValue(x)
-            elif plane == "Coronal":
-                hu_slice = self.all_slices_hu[:, index, :]
-                hu_slice = np.flipud(hu_slice)  
-                view.v_slider.setValue(z)
-                view.h_slider.setValue(x)
-            elif plane == "Sagittal":
-                hu_slice = self.all_slices_hu[:, :, index]
-                hu_slice = np.flipud(hu_slice) 
-                view.v_slider.setValue(z)
-                view.h_slider.setValue(y)
-            
-            # W/L適用ロジック
-            display_array = np.clip(hu_slice, lower, upper)
-            display_array = (display_array - lower) / ww * 255
-            img_data_255 = display_array.astype(np.uint8)
+        self.flush_count += 1
+        rendered = []
+        # ドラッグ中は変化した断面だけを縮小ボリュームで描画し、操作が止まったらそれらを全解像度で描き直す
+        proxy = self.parent.interactive_proxy()
+        indices = list(self.current_indices)
+        slice_info = None
+        
+        for plane, (view, index, spacing_z, spacing_xy, slider_values) in views_map.items():
+            # スライダーの同期 (valueChanged → 再描画の連鎖を起こさないようシグナルを止める)
+            for slider, value in zip((view.v_slider, view.h_slider), slider_values):
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
             
             slice_info = f"{plane} | Z:{z}, Y:{y}, X:{x}"
+            state = (index, ww, wl)
+            
+            if plane not in self._force_render and self._rendered_state.get(plane) == state:
+                # 断面も W/L も変わっていない: 参照線とテキストだけを更新する
+                view.set_overlay_info(slice_info, indices)
+                continue
             
-            # ビューを更新
-            view.set_image_data(img_data_255, ww, wl, 
-                                 slice_info=slice_info, 
-                                 indices=self.current_indices,
-                                 plane=plane,
-                                 is_mpr=True,
-                                 spacing_xy=spacing_xy,
-                                 spacing_z=spacing_z)
+            job = {
+                'volume': self.volume,
+                'layouts': self.parent.plane_layouts,
+                'proxy': proxy,
+                'index': index, 'ww': ww, 'wl': wl,
+                'perf_stats': self.parent.perf_stats if self.parent.show_perf_hud else None,
+                'view_kwargs': dict(slice_info=slice_info, indices=indices, plane=plane, is_mpr=True,
+                                    spacing_xy=spacing_xy, spacing_z=spacing_z),
+            }
+            if proxy is not None:
+                self._proxy_planes.add(plane)
+            else:
+                self._proxy_planes.discard(plane)
+            self._schedule_render(plane, job, state)
+            rendered.append(plane)
+        
+        if self.oblique is not None:
+            # 斜断面: 位置・向きが変わったときだけ補間し直し、W/L だけの変更は補間結果を使い回す
+            view = self.oblique_view
+            for slider, value in zip((view.v_slider, view.h_slider),
+                                     (round(self.oblique_tilt), round(self.oblique_azimuth))):
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
+            
+            geometry = ObliquePlane((z, y, x), self.oblique_azimuth, self.oblique_tilt)
+            slice_info = f"Oblique | 方位 {self.oblique_azimuth:.0f}°, 傾き {self.oblique_tilt:.0f}°"
+            state = (geometry, ww, wl)
+            if "Oblique" not in self._force_render and self._rendered_state.get("Oblique") == state:
+                view.set_overlay_info(slice_info, indices)
+            else:
+                job = {
+                    'volume': self.volume, 'oblique': self.oblique, 'index': geometry, 'ww': ww, 'wl': wl,
+                    'perf_stats': self.parent.perf_stats if self.parent.show_perf_hud else None,
+                    'view_kwargs': dict(slice_info=slice_info, indices=indices, plane="Oblique", is_mpr=True,
+                                        spacing_xy=1.0, spacing_z=1.0),
+                }
+                self._schedule_render("Oblique", job, state)
+                rendered.append("Oblique")
+        
+        self._force_render.clear()
+        self.last_flush_renders = rendered
+
+    def refine_full_resolution(self):
+        """
+        縮小ボリュームで描画した断面だけを、全解像度で描き直す。
+        """
+        if not self._proxy_planes: return
+        self._force_render.update(self._proxy_planes)
+        self.update_all_views()
+
+    def _schedule_render(self, plane, job, state):
+        self._request_ids[plane] += 1
+        job['request_id'] = self._request_ids[plane]
+        if self._in_flight[plane]:
+            # 実行中のジョブが終わってから最新の要求だけを描画する
+            self._queued_jobs[plane] = job
+        else:
+            self._submit_render(plane, job)
+        self._rendered_state[plane] = state
+
+    def _submit_render(self, plane, job):
+        self._in_flight[plane] = True
+        self._render_pool.submit(self._render_plane, plane, job)
+
+    def _render_plane(self, plane, job):
+        # ワーカースレッドで実行する。ウィジェットには触れず、結果はシグナルで返す
+        if plane == "Oblique":
+            self._render_oblique(job)
+            return
+        volume = job['volume']
+        layouts = job['layouts']
+        proxy = job['proxy']
+        if proxy is not None:
+            source = rescale_source = proxy.proxy
+            index = proxy.plane_index(plane, job['index'])
+        else:
+            source = layouts if layouts is not None and layouts.volume is volume else volume
+            rescale_source = volume
+            index = job['index']
+        render_start = time.perf_counter()
+        try:
+            with tracer.span('mpr_render_plane', plane=plane, proxy=proxy is not None):
+                # Coronal/Sagittal は上下反転済みの断面が返る
+                raw_slice = source.plane_raw(plane, index)
+                slope, intercept = rescale_source.plane_rescale(plane, index)
+                if volume.uniform_rescale is not None:
+                    slope, intercept = volume.uniform_rescale
+                
+                # W/L適用ロジック (生ピクセル値から LUT で直接 uint8 へ)。
+                # 表示中の画像を上書きしないよう、ジョブごとに新しいバッファへ書き込む
+                out = np.empty(raw_slice.shape, dtype=np.uint8)
+                img_data_255 = self.renderers[plane].render(raw_slice, job['ww'], job['wl'],
+                                                            slope, intercept, out=out)
+        except Exception as e:
+            job['error'] = f"{type(e).__name__}: {e}"
+            img_data_255 = None
+        if job['perf_stats'] is not None:
+            job['perf_stats'].record_render(time.perf_counter() - render_start)
+        self.plane_rendered.emit(plane, job, img_data_255)
+
+    def _render_oblique(self, job):
+        render_start = time.perf_counter()
+        try:
+            with tracer.span('mpr_render_oblique'):
+                img_data_255 = job['oblique'].render(job['index'], job['ww'], job['wl'])
+        except Exception as e:
+            job['error'] = f"{type(e).__name__}: {e}"
+            img_data_255 = None
+        if job['perf_stats'] is not None:
+            job['perf_stats'].record_render(time.perf_counter() - render_start)
+        self.plane_rendered.emit("Oblique", job, img_data_255)
+
+    def _on_plane_rendered(self, plane, job, img_data_255):
+        self._in_flight[plane] = False
+        queued = self._queued_jobs[plane]
+        if queued is not None:
+            self._queued_jobs[plane] = None
+            self._submit_render(plane, queued)
+        
+        if img_data_255 is None and job['request_id'] == self._request_ids[plane]:
+            # 最新の要求の描画に失敗した: 記録した状態を取り消し、次の更新で描画し直させる
+            self._rendered_state.pop(plane, None)
+            self.render_errors += 1
+            self.parent.statusBar().showMessage(f"MPR描画エラー ({plane}): {job.get('error')}")
+            tracer.count('mpr_render_errors')
+        
+        if (img_data_255 is None or job['volume'] is not self.volume
+                or job['request_id'] != self._request_ids[plane]):
+            # 後から新しい要求が出ている (またはボリュームが替わった) 結果は表示しない
+            self.stale_results += 1
+            return
+        
+        # ビューを更新 (GUI スレッドでは表示の差し替えだけを行う)
+        view = {"Axial": self.axial_view, "Coronal": self.coronal_view, "Sagittal": self.sagittal_view,
+                "Oblique": self.oblique_view}[plane]
+        view.set_image_data(img_data_255, job['ww'], job['wl'], **job['view_kwargs'])
+        self.render_counts[plane] += 1
+
+    def shutdown(self):
+        self._render_pool.shutdown(wait=False, cancel_futures=True)
+        self._oblique_pool.shutdown(wait=False, cancel_futures=True)
 
 
-# --- 4. メインビューワーウィンドウ (PyQtDicomViewer) ---
+# --- 4. シリーズ読み込みスレッド (段階的読み込み) ---
+class SeriesLoadThread(QThread):
+    series_found = Signal(object)       # プリスキャンで見つかったシリーズ (read_series.group_series の結果)
+    volume_allocated = Signal(object)   # 空のボリュームを確保した (read_series.SeriesVolume)
+    slab_loaded = Signal(int)           # 先頭から何枚目までデコードしたか
+    load_failed = Signal(str)
+
+    def __init__(self, filepaths, workers=None, executor='thread', cache=None, headers=None,
+                 prescan_only=False, parent=None):
+        super().__init__(parent)
+        self.filepaths = filepaths
+        self.workers = workers
+        self.executor = executor
+        self.cache = cache
+        self.headers = headers  # 索引などで読み込み済みのヘッダ (None の場合はプリスキャンする)
+        self.prescan_only = prescan_only  # シリーズ一覧だけを作る (キャッシュから開いた場合)
+
+    def run(self):
+        try:
+            if self.headers is not None:
+                series_headers = read_series.sort_slices(self.headers)
+            else:
+                groups = read_series.group_series(
+                    read_series.prescan_headers(self.filepaths, workers=self.workers))
+                self.series_found.emit(groups)
+                if self.prescan_only:
+                    return
+                series_headers = groups[0] if groups else []
+            if not series_headers:
+                self.load_failed.emit("画像を含むDICOMファイルが見つかりませんでした。")
+                return
+
+            volume = read_series.allocate_series_volume(series_headers)
+            self.volume_allocated.emit(volume)
+
+            for _, stop in read_series.iter_decode_slabs(volume, self.workers, self.executor):
+                if self.isInterruptionRequested():
+                    return
+                self.slab_loaded.emit(stop)
+
+            # ディスクへの書き出しはGUIを止めないよう、このスレッドで行う
+            if self.cache is not None:
+                self.cache.store(volume, self.filepaths)
+        except Exception as e:
+            self.load_failed.emit(str(e))
+
+
+class IndexScanThread(QThread):
+    progress = Signal(int, int)       # (読み込み済み, 読み込み対象)
+    scan_finished = Signal(object)    # series_index.SeriesIndex.scan の結果
+    scan_failed = Signal(str)
+
+    def __init__(self, index, root, workers=None, parent=None):
+        super().__init__(parent)
+        self.index = index
+        self.root = root
+        self.workers = workers
+
+    def run(self):
+        try:
+            result = self.index.scan(self.root, workers=self.workers, progress=self.progress.emit)
+            self.scan_finished.emit(result)
+        except Exception as e:
+            self.scan_failed.emit(str(e))
+
+
+# --- 5. メインビューワーウィンドウ (PyQtDicomViewer) ---
 class PyQtDicomViewer(QMainWindow):
-    def __init__(self):
+    def __init__(self, index_path=series_index.DEFAULT_INDEX_PATH):
         super().__init__()
         self.setWindowTitle("Advanced DICOM Viewer")
         self.setGeometry(100, 100, 1200, 800)
@@ -381,16 +938,61 @@ class PyQtDicomViewer(QMainWindow):
         self.files, self.ds = [], None
         self.index = 0
         self.pixel_min, self.pixel_max = 0, 4095
-        self.hu_data = None
-        self.all_slices_hu = None
+        # W/L が読み込み時の自動調整のままか (段階的読み込みでは最初のスラブだけから求めるため、
+        # 読み込み完了時にボリューム全体で求め直す。利用者が W/L を変えた場合はそのままにする)
+        self._wwl_from_load = False
+        self.raw_data, self.rescale = None, (1.0, 0.0)  # 表示中の断面の生ピクセル値と Slope/Intercept
+        self.renderer = WindowLevelRenderer()
+        self.volume = None  # read_series.SeriesVolume (生ピクセル値 + Rescale値)
+        # Coronal/Sagittal を連続メモリから切り出すための並べ替え済みコピー (None で無効)
+        self.layout_memory_budget = DEFAULT_LAYOUT_BUDGET
+        self.plane_layouts = None
+        # MPR のドラッグ中に使う縮小ボリューム (proxy_memory_budget = 0 で無効) と、
+        # 操作が止まってから全解像度で描き直すまでの時間
+        self.proxy_memory_budget = DEFAULT_PROXY_BUDGET
+        self.proxy_refine_delay_ms = DEFAULT_REFINE_DELAY_MS
+        self.proxy_volume = None
+        self._interacting = False
+        self._refine_timer = QTimer(self)
+        self._refine_timer.setSingleShot(True)
+        self._refine_timer.timeout.connect(self._refine_full_resolution)
         self.current_plane = "Axial"
         self.show_mpr_lines = True
         
         self.ww, self.wl = 400.0, 40.0
+        # 自動輝度調整に使うパーセンタイル (下限, 上限)
+        self.auto_wwl_percentiles = (1.0, 99.0)
         
         self.pixel_spacing = None
         self.slice_thickness = None
         self.slice_locations = {}
+        
+        # シリーズ読み込みのワーカー数 (None: CPUコア数) と実行方式 ('thread' / 'process')
+        self.load_workers = None
+        self.load_executor = 'thread'
+        # 読み込み済みボリュームのディスクキャッシュ (None で無効)
+        self.volume_cache = volume_cache.VolumeCache()
+        # 段階的読み込み: 先頭スライスから表示し、残りをバックグラウンドで読み込む
+        self.streaming_load = True
+        # MPRを有効にする読み込み済みスライスの割合
+        self.mpr_min_loaded_fraction = 0.5
+        self._load_thread = None
+        self._pending_volume = None
+        self._load_start_time = None
+        self._first_image_time = None
+        # フォルダ内のシリーズ (プリスキャン済みのヘッダ。シリーズの切り替えで再利用する)
+        self.series_groups = []
+        # DICOMファイルの索引 (大量の検査からシリーズを検索して開く)
+        self.series_index = series_index.SeriesIndex(index_path)
+        self._scan_thread = None
+        
+        # 描画のフレームペーシング (W/L ドラッグ・スライス移動などを max_fps 以下にまとめる)
+        self.frame_pacer = FramePacer(DEFAULT_MAX_FPS, parent=self)
+        self.frame_pacer.frame_done.connect(self._update_debug_overlay)
+        self.show_debug_overlay = False
+        # 性能HUD (FPS・描画/ペイント時間・入力から表示までの遅延・キャッシュヒット率)
+        self.perf_stats = PerfStats()
+        self.show_perf_hud = False
 
         self.create_menu()
         self.setup_ui()
@@ -401,6 +1003,8 @@ class PyQtDicomViewer(QMainWindow):
         
         open_folder_action = file_menu.addAction("フォルダを開く...")
         open_folder_action.triggered.connect(self.load_dicom_folder_dialog)
+        file_menu.addAction("フォルダを索引に追加...").triggered.connect(self.scan_folder_dialog)
+        file_menu.addAction("ボリュームキャッシュを削除").triggered.connect(self.clear_volume_cache)
         file_menu.addSeparator()
         file_menu.addAction("終了").triggered.connect(self.close)
         
@@ -414,6 +1018,20 @@ class PyQtDicomViewer(QMainWindow):
         self.mpr_view_action.triggered.connect(lambda: self.switch_view_mode(1))
         
         self.mpr_view_action.setEnabled(False)
+        
+        self.index_panel_action = view_menu.addAction("シリーズ索引")
+        view_menu.addSeparator()
+        trace_action = view_menu.addAction("性能トレースを記録")
+        trace_action.setCheckable(True)
+        trace_action.setChecked(tracer.enabled)
+        trace_action.toggled.connect(tracer.set_enabled)
+        view_menu.addAction("性能トレースを書き出す...").triggered.connect(self.export_trace_dialog)
+        debug_overlay_action = view_menu.addAction("描画デバッグ情報を表示")
+        debug_overlay_action.setCheckable(True)
+        debug_overlay_action.toggled.connect(self.set_debug_overlay)
+        perf_hud_action = view_menu.addAction("性能HUDを表示")
+        perf_hud_action.setCheckable(True)
+        perf_hud_action.toggled.connect(self.set_perf_hud)
 
     def setup_ui(self):
         central_widget = QWidget()
@@ -444,7 +1062,12 @@ class PyQtDicomViewer(QMainWindow):
         control_frame = QWidget()
         control_layout = QVBoxLayout(control_frame)
         
-        control_layout.addWidget(QPushButton("自動輝度調整", clicked=self.auto_adjust_wwl))
+        control_layout.addWidget(QPushButton("自動輝度調整", clicked=self.on_auto_wwl_clicked))
+        
+        # 自動輝度調整の対象 (ボリューム全体 / 表示中の画像)
+        self.auto_wwl_target_selector = QComboBox()
+        self.auto_wwl_target_selector.addItems(["ボリューム全体", "表示中の画像"])
+        control_layout.addWidget(self.auto_wwl_target_selector)
         
         # WW スライダー
         control_layout.addWidget(QLabel("ウィンドウ幅 (WW)"))
@@ -452,6 +1075,7 @@ class PyQtDicomViewer(QMainWindow):
         self.ww_slider.setRange(1, 4095)
         self.ww_slider.setValue(int(self.ww))
         self.ww_slider.valueChanged.connect(lambda v: self.set_wwl_from_slider(v, self.wl_slider.value()))
+        self.ww_slider.sliderReleased.connect(self.end_interaction)
         control_layout.addWidget(self.ww_slider)
         
         # WL スライダー
@@ -460,9 +1084,16 @@ class PyQtDicomViewer(QMainWindow):
         self.wl_slider.setRange(-1024, 3071)
         self.wl_slider.setValue(int(self.wl))
         self.wl_slider.valueChanged.connect(lambda v: self.set_wwl_from_slider(self.ww_slider.value(), v))
+        self.wl_slider.sliderReleased.connect(self.end_interaction)
         control_layout.addWidget(self.wl_slider)
         
         # 断面切り替えドロップダウンリスト (シングルビュー用)
+        control_layout.addWidget(QLabel("シリーズ選択"))
+        self.series_selector = QComboBox()
+        self.series_selector.setEnabled(False)
+        self.series_selector.currentIndexChanged.connect(self.on_series_change)
+        control_layout.addWidget(self.series_selector)
+        
         control_layout.addWidget(QLabel("断面選択"))
         self.plane_selector = QComboBox()
         self.plane_selector.addItems(["Axial", "Coronal", "Sagittal"])
@@ -486,6 +1117,8 @@ class PyQtDicomViewer(QMainWindow):
         single_layout = QVBoxLayout(self.single_view_widget)
         self.image_widget = ImageDisplayWidget(self)
         self.image_widget.wwl_changed.connect(self.update_wwl_from_mouse)
+        self.image_widget.interaction_finished.connect(self.end_interaction)
+        self.image_widget.frame_pacer = self.frame_pacer
         single_layout.addWidget(self.image_widget)
         self.view_stack.addWidget(self.single_view_widget)
 
@@ -523,6 +1156,42 @@ class PyQtDicomViewer(QMainWindow):
         self.addAction("Prev", self.prev_image, Qt.Key_Left)
         self.addAction("Next", self.next_image, Qt.Key_Right)
         
+        # 読み込み進捗 (ステータスバー)
+        self.load_progress = QProgressBar()
+        self.load_progress.setMaximumWidth(200)
+        self.load_progress.setVisible(False)
+        self.statusBar().addPermanentWidget(self.load_progress)
+        
+        # シリーズ索引パネル (ドック)
+        self.setup_index_panel()
+        
+    def setup_index_panel(self):
+        dock = QDockWidget("シリーズ索引", self)
+        panel = QWidget()
+        layout = QVBoxLayout(panel)
+        
+        search_layout = QHBoxLayout()
+        self.index_search_edit = QLineEdit()
+        self.index_search_edit.setPlaceholderText("患者名・ID・説明・モダリティで検索")
+        self.index_search_edit.textChanged.connect(self.refresh_index_panel)
+        search_layout.addWidget(self.index_search_edit)
+        search_layout.addWidget(QPushButton("フォルダを追加...", clicked=self.scan_folder_dialog))
+        layout.addLayout(search_layout)
+        
+        self.index_table = QTableWidget(0, 6)
+        self.index_table.setHorizontalHeaderLabels(["患者ID", "患者名", "検査日", "モダリティ", "シリーズ", "枚数"])
+        self.index_table.setSelectionBehavior(QAbstractItemView.SelectRows)
+        self.index_table.setEditTriggers(QAbstractItemView.NoEditTriggers)
+        self.index_table.horizontalHeader().setSectionResizeMode(4, QHeaderView.Stretch)
+        self.index_table.cellDoubleClicked.connect(self.open_indexed_series)
+        layout.addWidget(self.index_table)
+        
+        dock.setWidget(panel)
+        self.addDockWidget(Qt.BottomDockWidgetArea, dock)
+        dock.setVisible(False)
+        self.index_dock = dock
+        self.index_panel_action.triggered.connect(lambda: (dock.setVisible(True), self.refresh_index_panel()))
+        
     def addAction(self, name, method, shortcut):
         action = self.menuBar().addAction(name)
         action.triggered.connect(method)
@@ -530,14 +1199,17 @@ class PyQtDicomViewer(QMainWindow):
 
 
     def switch_view_mode(self, index):
-        if index == 1 and self.all_slices_hu is None:
+        if index == 1 and self.volume is None:
              QMessageBox.information(self, "情報", "DICOMシリーズを先に読み込んでください。")
              return
+        if index == 1 and not self._is_mpr_ready():
+             QMessageBox.information(self, "情報", "シリーズの読み込み中です。しばらくお待ちください。")
+             return
             
         self.view_stack.setCurrentIndex(index)
         
         if index == 1:
-            self.mpr_view_widget.load_mpr_data(self.all_slices_hu)
+            self.mpr_view_widget.load_mpr_data(self.volume)
             self.plane_selector.setVisible(False)
             self.slice_slider.setVisible(False)
             self.set_window_title("多断面比較")
@@ -555,83 +1227,348 @@ class PyQtDicomViewer(QMainWindow):
             self.load_dicom_folder(folder_path)
             
     def load_dicom_folder(self, folder_path):
-        temp_files = [os.path.join(folder_path, f) 
-                                 for f in os.listdir(folder_path) 
-                                 if f.lower().endswith('.dcm')]
+        temp_files = read_series.list_dicom_files(folder_path)
         
         if not temp_files:
             QMessageBox.critical(self, "エラー", "DICOMファイルが見つかりませんでした。")
             return
-        
-        unsorted_slices = []
-        slice_locations = {}
-        first_ds = None
+        self._on_series_found([])
+        self.load_dicom_files(temp_files)
+
+    @traced('load_dicom_files')
+    def load_dicom_files(self, temp_files, headers=None):
+        """
+        DICOMファイルを読み込んで表示する。headers (SliceHeader の一覧) を渡した場合は
+        プリスキャンを省略し、そのシリーズのファイルだけをデコードする。
+        """
+        self._cancel_series_load()
+        self._load_start_time = time.perf_counter()
+        self._first_image_time = None
         
         try:
-            for filepath in temp_files:
-                ds = pydicom.dcmread(filepath)
-                
-                location = getattr(ds, 'SliceLocation', None)
-                if location is None:
-                    location = getattr(ds, 'ImagePositionPatient', [0, 0, 0])[2] 
-                slice_locations[filepath] = location
-                
-                raw_array = ds.pixel_array
-                is_big_endian = not ds.file_meta.TransferSyntaxUID.is_little_endian
-                if is_big_endian:
-                    raw_array = raw_array.byteswap().newbyteorder('S')
-                
-                pixel_array = raw_array.astype(np.float32)
-                slope = getattr(ds, 'RescaleSlope', 1.0)
-                intercept = getattr(ds, 'RescaleIntercept', 0.0)
-                hu_slice = pixel_array * slope + intercept
-                
-                unsorted_slices.append((filepath, location, hu_slice, ds))
-                
-                if first_ds is None:
-                     first_ds = ds
-                     
-            sorted_slices = sorted(unsorted_slices, key=lambda x: x[1])
-            
-            self.files = [s[0] for s in sorted_slices]
-            self.all_slices_hu = np.stack([s[2] for s in sorted_slices])
-            self.ds = first_ds
-            
-            self.pixel_spacing = [float(p) for p in getattr(self.ds, 'PixelSpacing', [1.0, 1.0])]
-            self.slice_thickness = float(getattr(self.ds, 'SliceThickness', 1.0))
-
-            self.index = 0
-            self.slice_slider.setRange(0, self.all_slices_hu.shape[0] - 1)
-            self.mpr_view_action.setEnabled(True)
-            self.load_image(is_new_series=True)
-            self.set_window_title("単断面表示")
+            # 0. ディスクキャッシュがあればメモリマップで開く (プリスキャン・デコードは不要)
+            volume = self.volume_cache.load(temp_files) if self.volume_cache else None
+            if self.volume_cache:
+                self.perf_stats.record_cache('volume', volume is not None)
+            if volume is not None:
+                self.set_series_volume(volume)
+                self._report_load_time(finished=True)
+                if headers is None:
+                    # シリーズ一覧はバックグラウンドのプリスキャンで作る
+                    self._load_thread = SeriesLoadThread(temp_files, self.load_workers,
+                                                         prescan_only=True, parent=self)
+                    self._load_thread.series_found.connect(self._on_series_found)
+                    self._load_thread.start()
+                return
+            
+            if self.streaming_load:
+                # 1-2. プリスキャンとデコードをバックグラウンドで行い、スラブごとに表示を更新する
+                self._load_thread = SeriesLoadThread(temp_files, self.load_workers, self.load_executor,
+                                                     cache=self.volume_cache, headers=headers, parent=self)
+                self._load_thread.series_found.connect(self._on_series_found)
+                self._load_thread.volume_allocated.connect(self._on_volume_allocated)
+                self._load_thread.slab_loaded.connect(self._on_slab_loaded)
+                self._load_thread.load_failed.connect(self._on_load_failed)
+                self.load_progress.setVisible(True)
+                self.load_progress.setValue(0)
+                self._load_thread.start()
+                return
+            
+            # 1. ヘッダのみのプリスキャンで、シリーズと並び順を決める
+            if headers is not None:
+                series_headers = read_series.sort_slices(headers)
+            else:
+                groups = read_series.group_series(
+                    read_series.prescan_headers(temp_files, workers=self.load_workers))
+                self._on_series_found(groups)
+                series_headers = groups[0] if groups else []
+            if not series_headers:
+                QMessageBox.critical(self, "エラー", "画像を含むDICOMファイルが見つかりませんでした。")
+                return
+            
+            # 2. 選択したシリーズのみ、ピクセルのデコードをワーカープールで並列に行う
+            volume = read_series.load_series_volume(
+                series_headers, workers=self.load_workers, executor=self.load_executor)
+            if self.volume_cache:
+                self.volume_cache.store(volume, temp_files)
+            
+            self.set_series_volume(volume)
+            self._report_load_time(finished=True)
             
         except Exception as e:
-            QMessageBox.critical(self, "3D読み込みエラー", f"DICOMシリーズの読み込み中にエラーが発生しました: {e}")
-            self.files = []
-            self.all_slices_hu = None
+            self._on_load_failed(str(e))
+
+    def _on_series_found(self, groups, current=None):
+        if self._is_stale_signal(): return
+        self.series_groups = groups
+        
+        # 表示中 (または読み込み中) のシリーズを選択状態にする。読み込みは先頭のグループから始まる
+        if current is None:
+            current = 0
+            if self.volume is not None:
+                current = next((i for i, group in enumerate(groups)
+                                if group[0].filepath in self.volume.files), 0)
+        
+        self.series_selector.blockSignals(True)
+        self.series_selector.clear()
+        self.series_selector.addItems([self._series_label(group) for group in groups])
+        self.series_selector.setCurrentIndex(current)
+        self.series_selector.setEnabled(len(groups) > 1)
+        self.series_selector.blockSignals(False)
+
+    def _series_label(self, group):
+        h = group[0]
+        label = f"#{h.series_number}" if h.series_number is not None else "#-"
+        if h.series_description:
+            label += f" {h.series_description}"
+        details = [h.modality, read_series.orientation_label(h.orientation),
+                   f"{len(group)}枚", f"{h.cols}x{h.rows}"]
+        return f"{label} ({', '.join(d for d in details if d)})"
+
+    def on_series_change(self, index):
+        if not (0 <= index < len(self.series_groups)): return
+        group = self.series_groups[index]
+        if self.volume is not None and group[0].filepath in self.volume.files: return
+        # プリスキャン済みのヘッダを使い、選択したシリーズのファイルだけをデコードする
+        self.load_dicom_files([h.filepath for h in group], headers=group)
+
+    def set_series_volume(self, volume):
+        self.files = volume.files
+        self.volume = volume
+        self.ds = volume.header
+        if self.layout_memory_budget > 0:
+            self.plane_layouts = PlaneLayoutCache(volume, self.layout_memory_budget)
+        self.proxy_volume = None
+        if self.proxy_memory_budget > 0:
+            # 読み込み済みなら (キャッシュ・同期読み込み) すぐに作り始める
+            self.proxy_volume = ProxyVolume(volume, self.proxy_memory_budget)
+            self.proxy_volume.request_build()
+        
+        self.pixel_spacing = [float(p) for p in getattr(self.ds, 'PixelSpacing', [1.0, 1.0])]
+        self.slice_thickness = float(getattr(self.ds, 'SliceThickness', 1.0))
+
+        # 新しいシリーズは単断面 (Axial) 表示から始める
+        if self.view_stack.currentIndex() == 1:
+            self.view_stack.setCurrentIndex(0)
+            self.plane_selector.setVisible(True)
+            self.slice_slider.setVisible(True)
+        self.current_plane = "Axial"
+        self.plane_selector.blockSignals(True)
+        self.plane_selector.setCurrentText("Axial")
+        self.plane_selector.blockSignals(False)
+        
+        self.index = 0
+        self.slice_slider.setRange(0, self._max_index_for_plane(self.current_plane))
+        self.mpr_view_action.setEnabled(self._is_mpr_ready())
+        self.load_image(is_new_series=True)
+        self.set_window_title("単断面表示")
+
+    def _is_mpr_ready(self):
+        if self.volume is None: return False
+        return self.volume.loaded_slices >= self.volume.shape[0] * self.mpr_min_loaded_fraction
+
+    def _max_index_for_plane(self, plane_name):
+        # Axial は読み込み済みのスライスまでしか移動できない
+        if plane_name == "Axial":
+            return max(self.volume.loaded_slices, 1) - 1
+        elif plane_name == "Coronal":
+            return self.volume.shape[1] - 1
+        elif plane_name == "Sagittal":
+            return self.volume.shape[2] - 1
+
+    def _is_stale_signal(self):
+        # キャンセル済みの読み込みスレッドから遅れて届いたシグナルは無視する
+        sender = self.sender()
+        return isinstance(sender, SeriesLoadThread) and sender is not self._load_thread
+
+    def _on_volume_allocated(self, volume):
+        if self._is_stale_signal(): return
+        # まだデコードされていないため、最初のスラブが届くまで表示はしない
+        self.volume = None
+        self.plane_layouts = None
+        self.proxy_volume = None
+        self._pending_volume = volume
+        self.load_progress.setRange(0, volume.shape[0])
+
+    def _on_slab_loaded(self, loaded):
+        if self._is_stale_signal(): return
+        self.load_progress.setValue(loaded)
+        
+        if self.volume is None:
+            # 最初のスラブ: 先頭スライスをすぐに表示する
+            self.set_series_volume(self._pending_volume)
+            self._pending_volume = None
+            self._first_image_time = time.perf_counter()
+        else:
+            self.mpr_view_action.setEnabled(self._is_mpr_ready())
+            if self.current_plane == "Axial":
+                self.slice_slider.setRange(0, self._max_index_for_plane("Axial"))
+            elif self.view_stack.currentIndex() == 0:
+                # Coronal/Sagittal は新しく読み込まれた部分を反映する
+                self.load_image()
+            if self.view_stack.currentIndex() == 1:
+                self.mpr_view_widget.update_all_views(force=True)
+        
+        if self.volume.is_complete:
+            if self.proxy_volume is not None:
+                self.proxy_volume.request_build()
+            # スライダーの範囲変更で値が丸められても利用者の操作とは扱わないよう、先に判定する
+            refresh_wwl = self._wwl_from_load
+            hu_min, hu_max = self.volume.hu_range()
+            self.pixel_min, self.pixel_max = int(hu_min), int(hu_max)
+            self.wl_slider.setRange(self.pixel_min, self.pixel_max)
+            self.ww_slider.setRange(1, self.pixel_max - self.pixel_min)
+            if refresh_wwl:
+                # 最初のスラブから求めた W/L を、ボリューム全体のヒストグラムで求め直す
+                self.auto_adjust_wwl()
+            self.load_progress.setVisible(False)
+            self._report_load_time(finished=True)
+        else:
+            self._report_load_time(finished=False)
+
+    def _on_load_failed(self, message):
+        if self._is_stale_signal(): return
+        self.load_progress.setVisible(False)
+        QMessageBox.critical(self, "3D読み込みエラー", f"DICOMシリーズの読み込み中にエラーが発生しました: {message}")
+        self.files = []
+        self.volume = None
+        self.plane_layouts = None
+        self.proxy_volume = None
+
+    def _cancel_series_load(self):
+        if self._load_thread is not None:
+            self._load_thread.requestInterruption()
+            self._load_thread.wait()
+            self._load_thread = None
+        self._pending_volume = None
+        self.load_progress.setVisible(False)
+
+    def _report_load_time(self, finished):
+        # 読み込み開始から最初の画像表示まで (Time to First Image) と全体の所要時間を表示する
+        now = time.perf_counter()
+        if self._first_image_time is None:
+            self._first_image_time = now
+        ttfi_ms = (self._first_image_time - self._load_start_time) * 1000
+        if finished:
+            message = f"読み込み完了: 最初の画像まで {ttfi_ms:.0f} ms / 全体 {now - self._load_start_time:.2f} s"
+        else:
+            message = f"読み込み中 {self.volume.loaded_slices}/{self.volume.shape[0]}: 最初の画像まで {ttfi_ms:.0f} ms"
+        self.statusBar().showMessage(message)
+
+    def closeEvent(self, event):
+        trace_file = os.environ.get(TRACE_FILE_ENV)
+        if trace_file and tracer.enabled:
+            tracer.export_chrome_trace(trace_file)
+            print(tracer.format_summary())
+        self._cancel_series_load()
+        if self._scan_thread is not None:
+            self._scan_thread.wait()
+        self.mpr_view_widget.shutdown()
+        super().closeEvent(event)
+
+
+    # --- シリーズ索引 ---
+
+    def scan_folder_dialog(self):
+        folder_path = QFileDialog.getExistingDirectory(self, "索引に追加するフォルダを選択", os.path.expanduser("~"))
+        if folder_path:
+            self.scan_folder(folder_path)
+
+    def scan_folder(self, folder_path):
+        if self._scan_thread is not None and self._scan_thread.isRunning():
+            QMessageBox.information(self, "情報", "索引の作成中です。完了してから再度実行してください。")
+            return
+        
+        self._scan_thread = IndexScanThread(self.series_index, folder_path, self.load_workers, parent=self)
+        self._scan_thread.progress.connect(
+            lambda done, total: self.statusBar().showMessage(f"索引を作成中 {done}/{total}"))
+        self._scan_thread.scan_finished.connect(self._on_scan_finished)
+        self._scan_thread.scan_failed.connect(
+            lambda message: QMessageBox.critical(self, "索引エラー", f"索引の作成中にエラーが発生しました: {message}"))
+        self.statusBar().showMessage("索引を作成中...")
+        self._scan_thread.start()
+
+    def _on_scan_finished(self, result):
+        self.statusBar().showMessage(
+            f"索引を更新しました: 追加 {result['added']} / 更新 {result['updated']} / "
+            f"削除 {result['removed']} / 変更なし {result['unchanged']}")
+        self.index_dock.setVisible(True)
+        self.refresh_index_panel()
+
+    def refresh_index_panel(self):
+        if not self.index_dock.isVisible(): return
+        
+        self.index_series = self.series_index.search(self.index_search_edit.text())
+        self.index_table.setRowCount(len(self.index_series))
+        for row, series in enumerate(self.index_series):
+            description = series['series_description'] or series['study_description']
+            if series['series_number'] is not None:
+                description = f"#{series['series_number']} {description}"
+            details = [read_series.orientation_label(series['orientation']), f"{series['cols']}x{series['rows']}"]
+            description = f"{description} ({', '.join(d for d in details if d)})".lstrip()
+            values = [series['patient_id'], series['patient_name'], series['study_date'],
+                      series['modality'], description, str(series['n_files'])]
+            for col, value in enumerate(values):
+                self.index_table.setItem(row, col, QTableWidgetItem(value))
+
+    def open_indexed_series(self, row, _column=0):
+        series = self.index_series[row]
+        # 索引のヘッダを使うため、開くときはこのシリーズのファイルのピクセルだけを読む
+        headers = self.series_index.series_headers(series['series_uid'])
+        missing = [h.filepath for h in headers if not os.path.isfile(h.filepath)]
+        if not headers or missing:
+            QMessageBox.critical(self, "エラー", "索引のファイルが見つかりません。フォルダを索引に追加し直してください。")
+            return
+        # フォルダから開く場合と同じく、積み重ねられるグループに分けてシリーズ選択に並べる
+        groups = read_series.group_series(headers)
+        current = next((i for i, group in enumerate(groups)
+                        if (group[0].rows, group[0].cols, group[0].orientation)
+                        == (series['rows'], series['cols'], series['orientation'])), 0)
+        self._on_series_found(groups, current)
+        group = groups[current]
+        self.load_dicom_files([h.filepath for h in group], headers=group)
+
+    def export_trace_dialog(self):
+        path, _ = QFileDialog.getSaveFileName(self, "性能トレースを書き出す", "trace.json", "Chrome Trace (*.json)")
+        if not path: return
+        try:
+            tracer.export_chrome_trace(path)
+        except OSError as e:
+            QMessageBox.critical(self, "エラー", f"トレースの書き出しに失敗しました: {e}")
             return
+        
+        # 区間ごとの集計を表示する (トレース本体は chrome://tracing や Perfetto で開く)
+        summary_window = QWidget()
+        summary_window.setWindowTitle(f"性能トレース - {os.path.basename(path)}")
+        summary_window.setGeometry(150, 150, 800, 500)
+        text_widget = QTextEdit()
+        text_widget.setReadOnly(True)
+        text_widget.setFont(QFont("Courier New", 9))
+        text_widget.setText(tracer.format_summary())
+        layout = QVBoxLayout(summary_window)
+        layout.addWidget(text_widget)
+        summary_window.show()
+        self._trace_summary_window = summary_window
+
+    def clear_volume_cache(self):
+        if self.volume_cache is None: return
+        self.volume_cache.clear()
+        QMessageBox.information(self, "情報", "ボリュームキャッシュを削除しました。")
 
 
     def on_plane_change(self, plane_name):
-        if self.all_slices_hu is None: return
+        if self.volume is None: return
         
         self.current_plane = plane_name
         self.index = 0
         
-        if plane_name == "Axial":
-            max_index = self.all_slices_hu.shape[0] - 1
-        elif plane_name == "Coronal":
-            max_index = self.all_slices_hu.shape[1] - 1
-        elif plane_name == "Sagittal":
-            max_index = self.all_slices_hu.shape[2] - 1
-        
-        self.slice_slider.setRange(0, max_index)
+        self.slice_slider.setRange(0, self._max_index_for_plane(plane_name))
         self.load_image()
 
 
+    @traced('load_image')
     def load_image(self, is_new_series=False):
-        if self.all_slices_hu is None: return
+        if self.volume is None: return
         
         # 幾何学情報（読み込み時に設定済み）
         sp_y, sp_x, st = 1.0, 1.0, 1.0
@@ -639,30 +1576,33 @@ class PyQtDicomViewer(QMainWindow):
              sp_y, sp_x = self.pixel_spacing
              st = self.slice_thickness
         
-        # 断面データの抽出と上下反転処理
+        # 断面データの抽出 (Coronal/Sagittal は上下反転済み)。HU変換は W/L の LUT に含める
+        source = self.plane_layouts if self.plane_layouts is not None else self.volume
+        self.raw_data = source.plane_raw(self.current_plane, self.index)
+        if self.volume.uniform_rescale is not None:
+            self.rescale = self.volume.uniform_rescale
+        else:
+            self.rescale = self.volume.plane_rescale(self.current_plane, self.index)
         if self.current_plane == "Axial":
-            self.hu_data = self.all_slices_hu[self.index, :, :]
             spacing_xy = sp_x # 横軸Xの間隔
             spacing_z = sp_y  # 縦軸Yの間隔
         elif self.current_plane == "Coronal":
-            self.hu_data = self.all_slices_hu[:, self.index, :]
-            self.hu_data = np.flipud(self.hu_data)  # ★★★ 修正: 上下反転 ★★★
             spacing_xy = sp_x # 横軸Xの間隔
             spacing_z = st    # 縦軸Zの間隔 (スライス厚)
         elif self.current_plane == "Sagittal":
-            self.hu_data = self.all_slices_hu[:, :, self.index]
-            self.hu_data = np.flipud(self.hu_data)  # ★★★ 修正: 上下反転 ★★★
             spacing_xy = sp_y # 横軸Yの間隔
             spacing_z = st    # 縦軸Zの間隔 (スライス厚)
         
         if is_new_series:
             # ... (W/L範囲設定とオート調整は変更なし)
-            self.pixel_min = int(self.all_slices_hu.min())
-            self.pixel_max = int(self.all_slices_hu.max())
+            hu_min, hu_max = self.volume.hu_range()
+            self.pixel_min = int(hu_min)
+            self.pixel_max = int(hu_max)
             
             self.wl_slider.setRange(self.pixel_min, self.pixel_max)
             self.ww_slider.setRange(1, self.pixel_max - self.pixel_min)
             self.auto_adjust_wwl()
+            self._wwl_from_load = True
         else:
             self.update_image(spacing_xy=spacing_xy, spacing_z=spacing_z) # 幾何学情報を渡す
         
@@ -672,22 +1612,50 @@ class PyQtDicomViewer(QMainWindow):
 
 
     # --- W/L 関連のメソッド ---
+    def on_auto_wwl_clicked(self):
+        self._wwl_from_load = False
+        self.auto_adjust_wwl()
+
     def auto_adjust_wwl(self):
-        if self.all_slices_hu is None: return
+        if self.volume is None: return
         
-        p1 = np.percentile(self.all_slices_hu, 1)
-        p99 = np.percentile(self.all_slices_hu, 99)
+        # 読み込み時に集計したHUヒストグラムの累積和から求める (ボクセルのソートは不要)
+        if self.auto_wwl_target_selector.currentIndex() == 1:
+            p1, p99 = volume_stats.histogram_percentile(self.visible_histogram(), self.auto_wwl_percentiles)
+        else:
+            p1, p99 = self.volume.hu_percentile(self.auto_wwl_percentiles)
         
         new_ww = p99 - p1
         new_wl = (p99 + p1) / 2
         
         self.set_wwl(new_ww, new_wl)
         
+    def visible_histogram(self):
+        # 表示中の画像 (MPR表示では3断面) のHUヒストグラム
+        if self.view_stack.currentIndex() == 1 and self.mpr_view_widget.current_indices is not None:
+            z, y, x = self.mpr_view_widget.current_indices
+            planes = [("Axial", z), ("Coronal", y), ("Sagittal", x)]
+        else:
+            planes = [(self.current_plane, self.index)]
+        
+        hist = np.zeros(volume_stats.N_BINS, dtype=np.int64)
+        for plane, index in planes:
+            slope, intercept = self.volume.uniform_rescale or self.volume.plane_rescale(plane, index)
+            hist += volume_stats.hu_histogram(self.volume.plane_raw(plane, index), slope, intercept)
+        return hist
+        
     def set_wwl_from_slider(self, ww, wl):
-        self.set_wwl(float(ww), float(wl))
+        # ドラッグ中の連続した変更は、フレームごとに最新の値だけを描画する
+        self._wwl_from_load = False
+        self.mark_input('wwl')
+        self.begin_interaction()
+        self.frame_pacer.request('wwl', lambda: self.set_wwl(float(ww), float(wl)))
         
     def update_wwl_from_mouse(self, ww, wl):
-        self.set_wwl(ww, wl, update_slider=True)
+        self._wwl_from_load = False
+        self.mark_input('wwl')
+        self.begin_interaction()
+        self.frame_pacer.request('wwl', lambda: self.set_wwl(ww, wl, update_slider=True))
         
     def set_wwl(self, new_ww, new_wl, update_slider=False):
         self.ww = max(1.0, float(new_ww))
@@ -697,33 +1665,32 @@ class PyQtDicomViewer(QMainWindow):
             safe_ww = int(np.clip(self.ww, self.ww_slider.minimum(), self.ww_slider.maximum()))
             safe_wl = int(np.clip(self.wl, self.wl_slider.minimum(), self.wl_slider.maximum()))
             
-            self.ww_slider.setValue(safe_ww)
-            self.wl_slider.setValue(safe_wl)
+            # スライダーの valueChanged から set_wwl が再度呼ばれないようにする
+            for slider, value in ((self.ww_slider, safe_ww), (self.wl_slider, safe_wl)):
+                slider.blockSignals(True)
+                slider.setValue(value)
+                slider.blockSignals(False)
 
         self.update_image()
         self.update_info_panel()
 
 
+    @traced('update_image')
     def update_image(self, spacing_xy=1.0, spacing_z=1.0):
-        if self.hu_data is None: return
-        
-        lower, upper = self.wl - self.ww / 2, self.wl + self.ww / 2
-        
-        display_array = self.hu_data.copy()
-        np.clip(display_array, lower, upper, out=display_array)
+        if self.raw_data is None: return
         
-        if self.ww > 0:
-            display_array = (display_array - lower) / self.ww * 255
-        else:
-            display_array.fill(0)
-            
-        img_data_255 = display_array.astype(np.uint8)
+        # 生ピクセル値 → (HU変換 + W/L) を LUT 1回で適用する
+        slope, intercept = self.rescale
+        render_start = time.perf_counter()
+        img_data_255 = self.renderer.render(self.raw_data, self.ww, self.wl, slope, intercept)
+        if self.show_perf_hud:
+            self.perf_stats.record_render(time.perf_counter() - render_start)
 
         slice_info_str = f"{self.index + 1}/{self.slice_slider.maximum() + 1} ({self.current_plane})"
         
         # MPR参照線用の座標インデックスを設定
-        if self.all_slices_hu is not None:
-             max_z, max_y, max_x = self.all_slices_hu.shape
+        if self.volume is not None:
+             max_z, max_y, max_x = self.volume.shape
              
              # Axial, Coronal, Sagittal表示時、参照線は中心点とする
              if self.current_plane == "Axial":
@@ -768,7 +1735,7 @@ class PyQtDicomViewer(QMainWindow):
 
 
     def update_info_panel(self):
-        if self.all_slices_hu is None: return # all_slices_huがない場合は表示しない
+        if self.volume is None: return # volumeがない場合は表示しない
         
         is_axial_view = self.current_plane == "Axial"
         
@@ -789,6 +1756,17 @@ class PyQtDicomViewer(QMainWindow):
         spacing_info = "N/A"
         if self.pixel_spacing and self.slice_thickness:
              spacing_info = f"XY:{self.pixel_spacing[1]:.2f}x{self.pixel_spacing[0]:.2f}, Z:{self.slice_thickness:.2f} (mm)"
+        
+        # HU統計 (読み込み時にスライスごとに集計済みの値を使う)
+        stats = self.volume.stats
+        volume_summary = stats.volume_summary()
+        volume_stats_info = (f"{volume_summary['min']:.0f}〜{volume_summary['max']:.0f}, "
+                             f"平均 {volume_summary['mean']:.1f} ± {volume_summary['std']:.1f}")
+        slice_stats_info = "N/A"
+        if is_axial_view and self.index < len(stats.slice_count) and stats.slice_count[self.index] > 0:
+             slice_summary = stats.slice_summary(self.index)
+             slice_stats_info = (f"{slice_summary['min']:.0f}〜{slice_summary['max']:.0f}, "
+                                 f"平均 {slice_summary['mean']:.1f} ± {slice_summary['std']:.1f}")
              
         info = {
             "ファイル名": filename_info,
@@ -799,6 +1777,8 @@ class PyQtDicomViewer(QMainWindow):
             "WW/WL": f"{int(self.ww)}/{int(self.wl)}",
             "ズーム": f"{self.image_widget.zoom_factor:.2f}",
             "解像度/間隔": spacing_info,
+            "HU (スライス)": slice_stats_info,
+            "HU (ボリューム)": volume_stats_info,
             "エンディアン": endian_info
         }
         
@@ -810,7 +1790,7 @@ class PyQtDicomViewer(QMainWindow):
 
     def show_full_dicom_header(self):
         # ... (Axial以外ではヘッダ表示不可とする)
-        if self.all_slices_hu is None: 
+        if self.volume is None: 
             QMessageBox.information(self, "情報", "DICOMファイルが読み込まれていません。")
             return
             
@@ -837,19 +1817,78 @@ class PyQtDicomViewer(QMainWindow):
         new_index = int(value)
         if new_index != self.index:
             self.index = new_index
-            self.load_image()
+            self.request_load_image()
 
     def next_image(self):
-        if self.all_slices_hu is None: return
+        if self.volume is None: return
         if self.index < self.slice_slider.maximum():
             self.index += 1
-            self.load_image()
+            self.request_load_image()
 
     def prev_image(self):
-        if self.all_slices_hu is None: return
+        if self.volume is None: return
         if self.index > 0:
             self.index -= 1
-            self.load_image()
+            self.request_load_image()
+
+    def request_load_image(self):
+        # キーリピートやスライダーのスクロールは、フレームごとに最新のスライスだけを表示する
+        self.mark_input('slice')
+        self.frame_pacer.request('slice', self.load_image)
+
+    def begin_interaction(self):
+        # 操作が止まった (最後の入力から proxy_refine_delay_ms 経った) ら全解像度で描き直す
+        self._interacting = True
+        self._refine_timer.start(self.proxy_refine_delay_ms)
+
+    def end_interaction(self):
+        # マウス・スライダーを離したときは待たずに描き直す
+        self._refine_timer.stop()
+        self._refine_full_resolution()
+
+    def _refine_full_resolution(self):
+        if not self._interacting: return
+        self._interacting = False
+        if self.view_stack.currentIndex() == 1:
+            self.mpr_view_widget.refine_full_resolution()
+
+    def interactive_proxy(self):
+        """
+        MPR の描画に使う縮小ボリューム (ProxyVolume)。操作中でない、または未作成の場合は None。
+        """
+        if not self._interacting or self.proxy_volume is None:
+            return None
+        return self.proxy_volume if self.proxy_volume.get() is not None else None
+
+    def mark_input(self, kind):
+        # 性能HUDの「入力→表示」の遅延の起点を記録する
+        if self.show_perf_hud:
+            self.perf_stats.mark_input(kind)
+
+    def set_debug_overlay(self, enabled):
+        self.show_debug_overlay = enabled
+        self._update_debug_overlay()
+
+    def _update_debug_overlay(self):
+        text = ""
+        if self.show_debug_overlay:
+            pacer = self.frame_pacer
+            text = (f"{pacer.fps:.0f} fps (上限 {pacer.max_fps}) | "
+                    f"要求 {pacer.requested} / 間引き {pacer.dropped}")
+        for view in self._display_views():
+            if view.debug_info != text:
+                view.debug_info = text
+                view.update()
+
+    def set_perf_hud(self, enabled):
+        self.show_perf_hud = enabled
+        for view in self._display_views():
+            view.perf_stats = self.perf_stats if enabled else None
+            view.update()
+
+    def _display_views(self):
+        return (self.image_widget, self.mpr_view_widget.axial_view, self.mpr_view_widget.coronal_view,
+                self.mpr_view_widget.sagittal_view, self.mpr_view_widget.oblique_view)
 
 
 if __name__ == "__main__":